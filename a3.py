@@ -1,328 +1,20 @@
 from a3_support import *
+from a3_model import *
+import a3_save
+from a3_journal import Journal
+from a3_bot import ExpectimaxBot
+from a3_profile import TickProfiler
+from a3_scheduler import TickScheduler, CATCH_UP, SKIP
+from a3_worker import GameWorker, GameFrame, worker_requested, BOT, RESET, SAVE
+from a3_journal import ROTATE, FIRE, STEP, REWIND
+from a3_composite import FrameCompositor, composite_requested
+from a3_sprites import SpriteAtlas
+import time
 import tkinter as tk
-import random
 from tkinter import messagebox
 from PIL import Image, ImageTk
 from tkinter import filedialog
-
-class Entity:
-    """Entity is an abstract class that is used to represent any element
-    that can appear on the game’s grid."""
-    def display(self):
-        """Return the character used to represent this entity in a
-        text-based grid."""
-        raise NotImplementedError
-
-    def __repr__(self) -> str:
-        """Return a representation of this entity."""
-        return f'{self.__class__.__name__}()'
-
-class Player(Entity):
-    """A subclass of Entity representing a Player within the game."""
-    def display(self) -> str:
-        """Return the character representing a player: ’P’"""
-        return PLAYER
-
-class Destroyable(Entity):
-    """A subclass of Entity representing a Destroyable within the game.
-    A destroyable can be destroyed by the player but not collected."""
-    def display(self):
-        """Return the character representing a destroyable: ’D’"""
-        return DESTROYABLE
-
-class Collectable(Entity):
-    """A subclass of Entity representing a Collectable within the game.
-    A collectable can be destroyed or collected by the player."""
-    def display(self):
-        """Return the character representing a collectable: ’C’"""
-        return COLLECTABLE
-
-class Blocker(Entity):
-    """A subclass of Entity representing a Blocker within the game.
-    A blocker cannot be destroyed or collected by the player."""
-    def display(self):
-        """Return the character representing a blocker: ’B’"""
-        return BLOCKER
-
-class Bomb(Entity):
-    """A subclass of Entity representing a Bomb within the game that
-    player’s can destroy other entities with.
-    A bomb removes all entities within a ‘splash damage’ radius.
-    The SPLASH constant refers to the specific offsets.
-    A bomb can be destroyed but cannot be collected."""
-    def display(self):
-        """Return the character representing a bomb: ’B’"""
-        return BOMB
-
-class Grid:
-    """The Grid class is used to represent the 2D grid of entities.
-    The top left position of the grid is indicated by (0, 0)."""
-    def __init__(self, size: int) -> None:
-        """A grid is constructed with a size representing the number of
-        rows (equal to the number of columns) in the grid.
-        Entities should be stored in a dictionary. Initially a grid does
-        not contain any entities."""
-        self._size = size
-        self._entities = {}
-
-    def get_size(self) -> int:
-        """Return the size of the grid."""
-        return self._size
-
-    def add_entity(self, position: Position, entity: Entity) -> None:
-        """Add a given entity into the grid at a specified position.
-        This entity is only added if the position is valid.
-        If an entity already exists at the specified position, this method will
-        replace the current entity at the specified position.
-
-        Parameters:
-            position: Position,
-            the Position class in support.py
-
-            entity: Entity,
-        """
-        if isinstance(entity, Player):
-            self._entities[position] = entity
-
-        elif self.in_bounds(position):
-            self._entities[position] = entity
-
-    def get_entities(self) -> Dict[Position, Entity]:
-        """Return the dictionary containing grid entities.
-        Updating the returned dictionary should have no side-effects.
-
-        return:
-            Dict in format: {Position:Entity}
-        """
-        return self._entities
-
-    def get_entity(self, position: Position) -> Optional[Entity]:
-        """Return a entity from the grid at a specific position or None if
-        the position does not have a mapped entity."""
-        return self.get_entities().get(position)
-
-    def remove_entity(self, position: Position) -> None:
-        """Remove an entity from the grid at a specified position."""
-        if position in self.get_entities():
-            self._entities.pop(position)
-
-    def serialise(self) -> Dict[Tuple[int, int], str]:
-        """Convert dictionary of Position and Entities into a simplified,serialised
-        dictionary mapping tuples to characters, and return this serialised mapping.
-
-        return:
-            Dict in format: {Tuple(int, int):str}
-        """
-        return {(position.get_x(), position.get_y()):entity.display() for position, entity in self.get_entities().items()}
-
-    def in_bounds(self, position: Position) -> bool:
-        """Return a boolean based on whether the position is valid in terms of
-        the dimensions of the grid."""
-        return 0 <= position.get_x() < self.get_size() and 1 <= position.get_y() < self.get_size()
-
-    def __repr__(self) -> str:
-        """Return a representation of this Grid."""
-        return f'Grid({self.get_size()})'
-
-class Game:
-    """The Game handles the logic for controlling the actions of the entities within the grid."""
-    def __init__(self, size: int) -> None:
-        """A game is constructed with a size representing the dimensions of the playing grid.
-        A game should be constructed with at least the following variable:"""
-        self._size = size
-        self._grid = Grid(size)
-        self._player_position = Position(GRID_SIZE//2,0)
-        self._num_collected = 0
-        self._num_destroyed = 0
-        self._total_shots = 0
-        self._won_or_lose = None
-
-    def get_grid(self) -> Grid:
-        """Return the instance of the grid held by the game."""
-        return self._grid
-
-    def get_player_position(self) -> Position:
-        """Return the position of the player in the grid (top row, centre column).
-        This position should be constant."""
-        return self._player_position
-
-    def get_num_collected(self) -> int:
-        """Return the total of Collectables acquired."""
-        return self._num_collected
-
-    def get_num_destroyed(self) -> int:
-        """Return the total of Destroyables removed with a shot."""
-        return self._num_destroyed
-
-    def get_total_shots(self) -> int:
-        """Return the total of shots taken."""
-        return self._total_shots
-
-    def rotate_grid(self, direction: str) -> None:
-        """Rotate the positions of the entities within the grid depending on
-        the direction they are being rotated."""
-        rotated_entities = {}
-        offset_tuple = ROTATIONS[DIRECTIONS.index(direction)]
-        offset_position = Position(offset_tuple[0], offset_tuple[1])
-
-        for position, entity in self.get_grid().get_entities().items():
-            if isinstance(entity, Player):
-                rotated_entities[position] = entity
-
-            else:
-                rotated_position = position.add(offset_position)
-                if rotated_position.get_x() > 6:
-                    rotated_position._x = 0
-
-                elif rotated_position.get_x() < 0:
-                    rotated_position._x = 6
-
-                rotated_entities[rotated_position] = entity
-
-        self._grid._entities = rotated_entities
-
-    def create_entity(self, display: str) -> Entity:
-        """Uses a display character to create an Entity. Raises a NotImplementedError
-        if the character parsed into as the display is not an existing Entity."""
-        if display == PLAYER:
-            return Player()
-
-        elif display == COLLECTABLE:
-            return Collectable()
-
-        elif display == DESTROYABLE:
-            return Destroyable()
-
-        elif display == BLOCKER:
-            return Blocker()
-
-        elif display == BOMB:
-            return Bomb()
-
-        else:
-            raise NotImplementedError
-
-    def generate_entities(self) -> None:
-        """
-        Method given to the students to generate a random amount of entities to
-        add into the game after each step
-        """
-        # Generate amount
-        entity_count = random.randint(0, self.get_grid().get_size() - 3)
-        entities = random.choices(ENTITY_TYPES, k=entity_count)
-
-        # Blocker in a 1 in 4 chance
-        blocker = random.randint(1, 4) % 4 == 0
-
-        # UNCOMMENT THIS FOR TASK 3 (CSSE7030)
-        if TASK == 3:
-            bomb = False
-            if not blocker:
-                bomb = random.randint(1, 4) % 4 == 0
-
-        total_count = entity_count
-        if blocker:
-            total_count += 1
-            entities.append(BLOCKER)
-
-        # UNCOMMENT THIS FOR TASK 3 (CSSE7030)
-        if TASK == 3:
-            if bomb:
-                total_count += 1
-                entities.append(BOMB)
-
-        entity_index = random.sample(range(self.get_grid().get_size()),
-                                     total_count)
-
-        # Add entities into grid
-        for pos, entity in zip(entity_index, entities):
-            position = Position(pos, self.get_grid().get_size() - 1)
-            new_entity = self.create_entity(entity)
-            self.get_grid().add_entity(position, new_entity)
-
-    def step(self) -> None:
-        """Moves all entities on the board by an offset of (0, -1)."""
-        steped_entities = {}
-
-        for position, entity in self.get_grid().get_entities().items():
-            if isinstance(entity, Player):
-                steped_entities[position] = entity
-
-            else:
-                steped_position = position.add(Position(0,-1))
-
-                if steped_position.get_y() < 1 and isinstance(entity, Destroyable):
-                    self._won_or_lose = False
-
-                elif steped_position.get_y() >= 1:
-                    steped_entities[steped_position] = entity
-
-        self._grid._entities = steped_entities
-        self.generate_entities()
-
-    def fire(self, shot_type: str) -> None:
-        """Handles the firing/collecting actions of a player towards an entity
-        within the grid.
-
-        Parameter:
-            shot_type: str,
-            shot_type refers to whether a collect or destroy shot has been fired
-            (refer to Entity descriptions for how different entities react to
-            being hit by different types).
-        """
-        self._total_shots += 1
-        x = self.get_player_position().get_x()
-        for y in range(1, self.get_grid().get_size()):
-            target_position = Position(x, y)
-            target_entity = self.get_grid().get_entity(target_position)
-
-            if isinstance(target_entity, Blocker):
-                break
-
-            elif isinstance(target_entity, (Collectable, Destroyable, Bomb)):
-                if shot_type == COLLECT:
-                    if isinstance(target_entity, Collectable):
-                        self.get_grid().remove_entity(target_position)
-                        self._num_collected += 1
-                        if self.get_num_collected() >= COLLECTION_TARGET:
-                            self._won_or_lose = True
-                            break
-                        break
-
-                    else:
-                        break
-
-                elif shot_type == DESTROY:
-                    if isinstance(target_entity, Collectable):
-                        self.get_grid().remove_entity(target_position)
-                        break
-
-                    elif isinstance(target_entity, Destroyable):
-                        self.get_grid().remove_entity(target_position)
-                        self._num_destroyed += 1
-                        break
-
-                    elif isinstance(target_entity, Bomb):
-                        self.get_grid().remove_entity(target_position)
-                        self._num_destroyed += 1
-
-                        for x,y in SPLASH:
-                            splash_offset = Position(x,y)
-                            splashed_position = target_position.add(splash_offset)
-                            if isinstance(self.get_grid().get_entity(splashed_position), Destroyable):
-                                self._num_destroyed += 1
-
-                            if not isinstance(self.get_grid().get_entity(splashed_position), Player):
-                                self.get_grid().remove_entity(splashed_position)
-                        break
-
-    def has_won(self) -> bool:
-        """Return True if the player has won the game."""
-        return self._won_or_lose
-
-    def has_lost(self) -> bool:
-        """Returns True if the game is lost (a Destroyable has reached the top row)."""
-        return self._won_or_lose
+from collections import OrderedDict, deque
 
 class AbstrackField(tk.Canvas):
     def __init__(self, master, rows: int, cols: int, width: int, height: int, **kwargs):
@@ -402,15 +94,22 @@ class AbstrackField(tk.Canvas):
         x, y = (x_min+x_max)/2, (y_min+y_max)/2
         return (x, y)
 
-    def annotate_position(self, position: Position, text: str) -> None:
-        """Annotatesthecenterofthecellatthegiven (row, column) position with the provided text."""
+    def annotate_position(self, position: Position, text: str) -> int:
+        """Annotatesthecenterofthecellatthegiven (row, column) position with the provided text.
+
+        return: The canvas id of the created text item
+        """
         center = self.get_position_center(position)
-        self.create_text(center[0], center[1], text=text)
+        return self.create_text(center[0], center[1], text=text)
 
 class GameField(AbstrackField):
     """GameField is a visual representation of the game grid which inherits from
     AbstractField. Entities are drawn on the map using coloured rectangles at
-    different (row, column) positions."""
+    different (row, column) positions.
+
+    The canvas items of each cell are kept between frames: a redraw compares
+    the new entities with the previous frame and only reconfigures, creates
+    or hides the items of cells that changed."""
     def __init__(self, master, size: int, width: int, height: int, **kwargs):
         """The size parameter is the number of rows (= number of columns) in the grid,
         width and height are the width and height of the grid (in pixels).
@@ -436,32 +135,69 @@ class GameField(AbstrackField):
         self._master = master
         self._size = size
 
+        # retained canvas items: (x, y) -> (rectangle id, text id), and the last frame drawn
+        self._cell_items = {}
+        self._frame = {}
+        self._churn = {'created': 0, 'configured': 0, 'hidden': 0}
+
     def draw_grid(self, entities: Dict[Position, Entity]) -> None:
         """Draws the entities (found in the Grid’s entity dictionary) in the game
         grid at their given position using a coloured rectangle with superimposed
         text identifying the entity (this includes the Player entity).
 
+        Only cells whose entity changed since the previous call are touched.
+
         Parameter:
             entities: Dict[Position, Entity],
             The dictionary of all entities from instance of Grid class.
         """
-        self.delete(tk.ALL)
+        frame = {(position.get_x(), position.get_y()): entity.display() for position, entity in entities.items()}
+        churn = {'created': 0, 'configured': 0, 'hidden': 0}
 
-        for position, entity in entities.items():
-            x_min, y_min, x_max, y_max = self.get_bbox(position)
-            self.create_rectangle(x_min, y_min, x_max, y_max, fill=COLOURS[entity.display()])
-            self.annotate_position(position, entity.display())
+        for cell, display in frame.items():
+            if self._frame.get(cell) == display:
+                continue
+
+            if cell in self._cell_items:
+                rectangle, text = self._cell_items[cell]
+                self.itemconfig(rectangle, fill=COLOURS[display], state=tk.NORMAL)
+                self.itemconfig(text, text=display, state=tk.NORMAL)
+                churn['configured'] += 2
+
+            else:
+                position = Position(cell[0], cell[1])
+                x_min, y_min, x_max, y_max = self.get_bbox(position)
+                rectangle = self.create_rectangle(x_min, y_min, x_max, y_max, fill=COLOURS[display])
+                text = self.annotate_position(position, display)
+                self._cell_items[cell] = (rectangle, text)
+                churn['created'] += 2
+
+        for cell in self._frame.keys() - frame.keys():
+            for item in self._cell_items[cell]:
+                self.itemconfig(item, state=tk.HIDDEN)
+            churn['hidden'] += 2
+
+        self._frame = frame
+        self._churn = churn
+
+    def get_churn(self) -> Dict[str, int]:
+        """Return how many canvas items the last draw_grid call created,
+        reconfigured and hidden."""
+        return dict(self._churn)
 
     def draw_player_area(self) -> None:
-        """Draws the grey area a player is placed on."""
-        self.create_rectangle(0, 0, (MAP_WIDTH//GRID_SIZE*3), (MAP_WIDTH//GRID_SIZE*1), fill=PLAYER_AREA)
-        self.create_rectangle((MAP_WIDTH//GRID_SIZE*4), 0, MAP_WIDTH, (MAP_WIDTH//GRID_SIZE*1), fill=PLAYER_AREA)
+        """Draws the grey area either side of the player's column in the top row."""
+        player_x = self._size//2
+        self.create_rectangle(0, 0, player_x*self._cell_width, self._cell_height, fill=PLAYER_AREA)
+        self.create_rectangle((player_x + 1)*self._cell_width, 0, self._cols*self._cell_width, self._cell_height,
+                              fill=PLAYER_AREA)
 
 class ScoreBar(AbstrackField):
     """ScoreBar is a visual representation of shot statistics from the player which inherits from AbstractField."""
     def __init__(self, master, rows: int, **kwargs):
-        """rows is the number of rows contained in the ScoreBar canvas.
-        This should match the size of the grid. By default, columns should be set to 2.
+        """rows is the number of rows contained in the ScoreBar canvas. It sets
+        the spacing of the scores, so it does not need to match the size of the
+        grid. By default, columns should be set to 2.
 
         Parameters:
             master: master,
@@ -475,25 +211,65 @@ class ScoreBar(AbstrackField):
             should also be supported by this class.
         """
         super().__init__(master, rows=rows, cols=2, width=SCORE_WIDTH, height=MAP_HEIGHT, **kwargs)
-        self.create_text(SCORE_WIDTH/2, MAP_HEIGHT/GRID_SIZE/2, text="Score", fill="white", font=TITLE_FONT)
-        self.create_text(SCORE_WIDTH/4, MAP_HEIGHT/GRID_SIZE*1.5, text="Collected: ", fill="white")
-        self.create_text(SCORE_WIDTH/4, MAP_HEIGHT/GRID_SIZE*2.5, text="Destroyed: ", fill="white")
+        self.create_text(SCORE_WIDTH/2, self._cell_height/2, text="Score", fill="white", font=TITLE_FONT)
+        self.create_text(*self.get_position_center(Position(0, 1)), text="Collected: ", fill="white")
+        self.create_text(*self.get_position_center(Position(0, 2)), text="Destroyed: ", fill="white")
+
+        # the numbers are reconfigured in place rather than redrawn
+        self._collected_id = self.create_text(*self.get_position_center(Position(1, 1)), text=0, fill="white")
+        self._destroyed_id = self.create_text(*self.get_position_center(Position(1, 2)), text=0, fill="white")
+
+    def update_scores(self, collected: int, destroyed: int) -> None:
+        """Show the given numbers of collected and destroyed entities.
+
+        Parameters:
+            collected: int,
+            The number of entities collected
+
+            destroyed: int,
+            The number of entities destroyed
+        """
+        self.itemconfig(self._collected_id, text=collected)
+        self.itemconfig(self._destroyed_id, text=destroyed)
 
 class HackerController:
-    """HackerController acts as the controller for the Hacker game."""
-    def __init__(self, master, size: int):
+    """HackerController acts as the controller for the Hacker game.
+
+    The game normally runs on the Tk event loop. In worker mode a GameWorker
+    thread owns the game instead: the controller submits every input and
+    step to it and draws the newest frame it publishes every FRAME_SECONDS,
+    never touching the game itself."""
+    def __init__(self, master, size: int, use_worker: Optional[bool] = None):
         """The parameter master represents the master window and size represents
         the number of rows (equal to columns) in the game map. The title label,
-        Game Model, Game Field, Scorebar and game's step will be initialized here."""
+        Game Model, Game Field, Scorebar and game's step will be initialized here.
+        use_worker runs the game on a worker thread, by default if WORKER_ENV is set."""
         self._master = master
         self._size = size
         self._master.bind("<Key>", self.handle_keypress)
-        self._master.after(2*1000, self.step)
+
+        # every repeating callback runs through the scheduler
+        self._scheduler = TickScheduler(self._master)
+        self._scheduler.add(STEP_CHAIN, STEP_SECONDS, self.step, SKIP)
+        self._scheduler.start(STEP_CHAIN)
 
         # initialize the game mode and store its grid including initializing the player entity
         self._game = Game(self._size)
         grid = self._game.get_grid()
-        grid.add_entity(Position(GRID_SIZE//2,0), Player())
+        grid.add_entity(self._game.get_player_position(), Player())
+
+        # record every input so the session can be replayed headlessly
+        self._journal = Journal(JOURNAL_FILE)
+        self._journal.start(self._game)
+        self._bot = None
+
+        # per-phase tick timings, dumped to PROFILE_FILE when the window closes
+        self._profiler = TickProfiler.from_environment()
+        self._master.bind("<Destroy>", self.handle_destroy, add="+")
+
+        # the time of the latest input not yet drawn, for measuring its latency
+        self._input_time = None
+        self._worker = None
 
         # draw the hacker title using Label
         self._hacker_lbl = tk.Label(self._master, text=TITLE, bg=TITLE_BG, font=TITLE_FONT, fg="white")
@@ -510,11 +286,47 @@ class HackerController:
         self._game_field.draw_player_area()
 
         # initialize and draw the score bar, and it is in the frame:
-        self._score_bar = ScoreBar(self._frame, self._size, bg=SCORE_COLOUR)
+        self._score_bar = ScoreBar(self._frame, SCORE_ROWS, bg=SCORE_COLOUR)
         self._score_bar.pack(side=tk.LEFT)
+        self._score_bar.update_scores(self._game.get_num_collected(), self._game.get_num_destroyed())
+
+        if worker_requested() if use_worker is None else use_worker:
+            self.start_worker()
 
-        self._text_id_1 = self._score_bar.create_text(SCORE_WIDTH/4*3, MAP_HEIGHT/GRID_SIZE*1.5, text=self._game.get_num_collected(), fill="white")
-        self._text_id_2 = self._score_bar.create_text(SCORE_WIDTH/4*3, MAP_HEIGHT/GRID_SIZE*2.5, text=self._game.get_num_destroyed(), fill="white")
+    def start_worker(self, history: int = 0) -> None:
+        """Hand the game over to a worker thread and start drawing its frames.
+
+        Parameter:
+            history: int,
+            The number of steps the worker keeps for rewinding
+        """
+        self._worker = GameWorker(self._game, self._journal, self._profiler, history)
+        self._worker.submit(BOT, self._bot)
+        self._game = None
+        self._scheduler.add(FRAME_CHAIN, FRAME_SECONDS, self.poll, SKIP)
+        self._worker.start()
+        self._scheduler.start(FRAME_CHAIN)
+
+    def poll(self) -> None:
+        """Draw the newest frame published by the worker, if there is one,
+        dropping any older frames. If the worker failed, every chain is
+        stopped so the failure is reported once rather than on every poll."""
+        try:
+            frame = self._worker.take_frame()
+        except RuntimeError as error:
+            self._scheduler.stop_all()
+            messagebox.showerror("Game stopped", f"{error}: {error.__cause__!r}")
+            raise
+
+        if frame is not None:
+            self.draw_frame(frame)
+            self.draw_profile()
+            self.handle_outcome(frame.get_outcome())
+
+    def take_input_time(self) -> Optional[float]:
+        """Return and clear the time of the latest input not yet drawn."""
+        input_time, self._input_time = self._input_time, None
+        return input_time
 
     def handle_keypress(self, event) -> None:
         """This method should be called when the user presses any key during the game.
@@ -525,11 +337,19 @@ class HackerController:
             event: tkinter event,
         """
         if event.keysym in [LEFT, RIGHT, LEFT.lower(), RIGHT.lower()]:
+            self._input_time = time.perf_counter()
             self.handle_rotate(event.keysym.upper())
 
         elif event.keysym.upper() in [COLLECT, DESTROY]:
+            self._input_time = time.perf_counter()
             self.handle_fire(event.keysym.upper())
 
+        elif event.keysym.upper() == BOT_KEY:
+            self.toggle_bot()
+
+        elif event.keysym.upper() == PROFILE_KEY:
+            self.toggle_profiler()
+
     def draw(self, game: Game) -> None:
         """Clears and redraws the view based on the current game state.
 
@@ -537,16 +357,26 @@ class HackerController:
             game: Game,
             An instance of the Game class
         """
-        # draw a new game field
-        self._game_field.draw_grid(game.get_grid().get_entities())
-        self._game_field.draw_player_area()
+        self.draw_frame(GameFrame.capture(game, self.take_input_time()))
 
-        # for the score, delete the previous score number and draw the new one
-        self._score_bar.delete(self._text_id_1)
-        self._score_bar.delete(self._text_id_2)
+    def draw_frame(self, frame: GameFrame) -> None:
+        """Redraws the view from a frame of the game, and records the latency
+        of the input it shows.
 
-        self._text_id_1 = self._score_bar.create_text(SCORE_WIDTH/4*3, MAP_HEIGHT/GRID_SIZE*1.5, text=self._game.get_num_collected(), fill="white")
-        self._text_id_2 = self._score_bar.create_text(SCORE_WIDTH/4*3, MAP_HEIGHT/GRID_SIZE*2.5, text=self._game.get_num_destroyed(), fill="white")
+        Parameter:
+            frame: GameFrame,
+            The entities and counters to draw
+        """
+        # update the game field, the player area is static and drawn once
+        with self._profiler.phase('canvas'):
+            self._game_field.draw_grid(frame.get_entities())
+
+        # update the score numbers in place
+        with self._profiler.phase('score'):
+            self._score_bar.update_scores(frame.get_num_collected(), frame.get_num_destroyed())
+
+        if frame.get_input_time() is not None:
+            self._profiler.record('latency', time.perf_counter() - frame.get_input_time())
 
     def handle_rotate(self, direction: str) -> None:
         """Handles rotation of the entities and redrawing the game. It may be
@@ -556,36 +386,178 @@ class HackerController:
         Parameter:
             direction: str,
         """
-        self._game.rotate_grid(direction)
+        if self._worker is not None:
+            self._worker.submit(ROTATE, direction, input_time=self.take_input_time())
+            return
+
+        with self._profiler.phase('model'):
+            self._game.rotate_grid(direction)
+        with self._profiler.phase('journal'):
+            self._journal.record_rotate(direction)
         self.draw(self._game)
 
     def handle_fire(self, shot_type: str) -> None:
         """Handles the firing of the specified shot type and redrawng of the game.
         It may be easiest for the handle_keypress method to call handle_fire with
         the relevant arguments."""
-        self._game.fire(shot_type)
+        if self._worker is not None:
+            self._worker.submit(FIRE, shot_type, input_time=self.take_input_time())
+            return
+
+        with self._profiler.phase('model'):
+            self._game.fire(shot_type)
+        with self._profiler.phase('journal'):
+            self._journal.record_fire(shot_type)
         self.draw(self._game)
 
+    def toggle_bot(self) -> None:
+        """Hand the game over to the expectimax bot, or take it back."""
+        self._bot = ExpectimaxBot() if self._bot is None else None
+        if self._worker is not None:
+            self._worker.submit(BOT, self._bot)
+
+    def play_bot_turn(self) -> None:
+        """Play the rotations and shots the bot plans before the next step."""
+        with self._profiler.phase('bot'):
+            actions = self._bot.plan(self._game)
+
+        for action in actions:
+            if action in DIRECTIONS:
+                self.handle_rotate(action)
+            else:
+                self.handle_fire(action)
+
+    def toggle_profiler(self) -> None:
+        """Start or stop recording the time spent in each phase of a tick."""
+        self._profiler.toggle()
+        self.draw_profile()
+
+    def draw_profile(self) -> None:
+        """Show the latest tick timings. HackerController has no status bar
+        to show them on, so they are only dumped when the window closes."""
+        pass
+
+    def handle_destroy(self, event) -> None:
+        """Stop the game and dump the tick timings when the main window is destroyed.
+
+        Parameter:
+            event: tkinter event,
+        """
+        if event.widget is self._master:
+            self.end_game()
+            self._profiler.dump(PROFILE_FILE)
+
+    def end_game(self) -> None:
+        """Stop everything that ticks, and the worker if there is one, then
+        close the journal. Calling it again does nothing more."""
+        self._scheduler.stop_all()
+        if self._worker is not None:
+            self._worker.stop()
+        self._journal.close()
+
     def step(self):
-        """This method is called every 2 seconds and triggers the step method for
-        the game and updates the view accordingly."""
-        self._game.step()
+        """This method is called every 2 seconds by the scheduler and triggers
+        the step method for the game and updates the view accordingly."""
+        if self._worker is not None:
+            self._worker.submit(STEP)
+            return
+
+        if self._bot is not None:
+            self.play_bot_turn()
+        with self._profiler.phase('model'):
+            self._game.step()
+        with self._profiler.phase('journal'):
+            self._journal.record_step(self._game)
         self.draw(self._game)
+        self.draw_profile()
+        self.handle_outcome(self._game.has_won())
 
-        # controll the game and messagebox by win or lost
-        if self._game.has_won() is None:
+    def handle_outcome(self, outcome: Optional[bool]) -> None:
+        """Show the win or lose message once the game is over.
+
+        Parameter:
+            outcome: bool,
+            True if the game was won, False if it was lost, None if it goes on
+        """
+        # controll the game and messagebox by win or lost, nothing ticks once it is over
+        if outcome is None:
             pass
 
-        elif self._game.has_won():
+        elif outcome:
+            self.end_game()
             if messagebox.showinfo("WIN", "Congratulation! You Win!"):
                 self._master.destroy()
 
-        elif not self._game.has_lost():
+        else:
+            self.end_game()
             if messagebox.showinfo("LOSE", "Sorry! You Lost!"):
                 self._master.destroy()
-        
-        # recursive
-        self._master.after(2*1000, self.step)
+
+class SpriteCache:
+    """SpriteCache keeps one PhotoImage per (display character, cell size),
+    made from the sprites of a SpriteAtlas prescaled to that cell size, so
+    every frame reuses the same images and the atlas is only decoded once.
+
+    At most max_photos PhotoImages are kept; the least recently used one is
+    dropped when the limit is reached."""
+    def __init__(self, directory: str = 'images', max_photos: int = 64) -> None:
+        """
+        Parameters:
+            directory: str,
+            The directory the sprite atlas (or else the IMAGES files) is read from
+
+            max_photos: int,
+            The largest number of PhotoImages kept at once
+        """
+        self._atlas = SpriteAtlas(directory, max_photos)
+        self._max_photos = max_photos
+        self._photos = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get_image(self, display: str) -> Image.Image:
+        """Return the unscaled sprite of the entity with the given display character."""
+        return self._atlas.get_sprite(display)
+
+    def get_scaled(self, display: str, cell_size: Tuple[int, int]) -> Image.Image:
+        """Return the sprite of an entity scaled to cells of the given
+        (width, height) in pixels."""
+        return self._atlas.get_scaled(display, cell_size)
+
+    def get_photo(self, display: str, cell_size: Tuple[int, int]) -> ImageTk.PhotoImage:
+        """Return the PhotoImage of the entity with the given display character
+        for cells of the given (width, height) in pixels."""
+        key = (display, cell_size)
+        if key in self._photos:
+            self._hits += 1
+            self._photos.move_to_end(key)
+            return self._photos[key]
+
+        self._misses += 1
+        photo = ImageTk.PhotoImage(self._atlas.get_scaled(display, cell_size))
+        self._photos[key] = photo
+        if len(self._photos) > self._max_photos:
+            self._photos.popitem(last=False)
+        return photo
+
+    def prescale(self, cell_size: Tuple[int, int]) -> None:
+        """Make the PhotoImage of every entity for a cell size ahead of the
+        first frame drawn at it."""
+        for display in ATLAS_ORDER:
+            self.get_photo(display, cell_size)
+
+    def get_atlas(self) -> SpriteAtlas:
+        """Return the atlas the sprites are taken from."""
+        return self._atlas
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return the number of PhotoImages held, the photo cache hits and
+        misses, and the statistics of the atlas."""
+        stats = {'photos': len(self._photos),
+                 'hits': self._hits,
+                 'misses': self._misses}
+        stats.update({f'atlas_{name}': value for name, value in self._atlas.get_stats().items()})
+        return stats
 
 class ImageGameField(GameField):
     """ImageGameField extends the existing GameField class and behaves similarly
@@ -614,7 +586,8 @@ class ImageGameField(GameField):
         super().__init__(master, size, width, height, **kwargs)
         self._master = master
         self._size = size
-        self._images = []
+        self._sprites = SpriteCache()
+        self._sprites.prescale((int(self._cell_width), int(self._cell_height)))
 
     def draw_grid(self, entities: Dict[Position, Entity]) -> None:
         """Draws the entities (found in the Grid’s entity dictionary) in the game
@@ -630,26 +603,66 @@ class ImageGameField(GameField):
         # if draw_player_area in AdvanceHackerControll, the player image will be covered, or the area be covered
         self.draw_player_area()
 
+        cell_size = (int(self._cell_width), int(self._cell_height))
         for position, entity in entities.items():
             center = self.get_position_center(position)
-            image = ImageTk.PhotoImage(Image.open(f'images/{IMAGES[entity.display()]}'))
-            self._images.append(image)
+            image = self._sprites.get_photo(entity.display(), cell_size)
             self.create_image(center[0], center[1], image=image)
 
+    def get_sprites(self) -> SpriteCache:
+        """Return the sprite cache used by this field."""
+        return self._sprites
+
     def draw_player_area(self) -> None:
-        """Draws the grey area a player is placed on."""
-        self.create_rectangle(0, 0, (MAP_WIDTH//GRID_SIZE*7), (MAP_HEIGHT//GRID_SIZE*1), fill=PLAYER_AREA)
+        """Draws the grey top row the player is placed on, under its image."""
+        self.create_rectangle(0, 0, self._cols*self._cell_width, self._cell_height, fill=PLAYER_AREA)
+
+class CompositeGameField(ImageGameField):
+    """CompositeGameField draws the same field as ImageGameField, but paints
+    it into one Pillow image with a FrameCompositor and shows that image as
+    the canvas's only item. A redraw repaints the changed cells and pushes
+    the image into its single PhotoImage, so the canvas work per frame does
+    not grow with the number of entities."""
+    def __init__(self, master, size: int, width: int, height: int, **kwargs):
+        """Parameters as for ImageGameField."""
+        super().__init__(master, size, width, height, **kwargs)
+        self._compositor = FrameCompositor(size, int(width), int(height), self._sprites.get_scaled)
+        self._photo = ImageTk.PhotoImage(self._compositor.get_buffer())
+        self.create_image(0, 0, image=self._photo, anchor=tk.NW)
+
+    def draw_grid(self, entities: Dict[Position, Entity]) -> None:
+        """Composites the cells that changed into the field image and pushes
+        it to the canvas, unless nothing changed.
+
+        Parameter:
+            entities: Dict[Position, Entity],
+            The dictionary of all entities from instance of Grid class.
+        """
+        image = self._compositor.render(entities)
+        if self._compositor.get_painted():
+            self._photo.paste(image)
+
+    def draw_player_area(self) -> None:
+        """The player area is part of the composited image."""
+        pass
 
 class AdvancedHackerController(HackerController):
     """AdvancedHackerController extends the functionality of HackerController."""
-    def __init__(self, master, size: int):
+    def __init__(self, master, size: int, use_worker: Optional[bool] = None):
         """The parameter master represents the master window and size represents
         the number of rows (equal to columns) in the game map. The title label,
-        Game Model, Game Field, Scorebar, Statusbar and game's step will be initialized here."""
+        Game Model, Game Field, Scorebar, Statusbar and game's step will be initialized here.
+        use_worker runs the game on a worker thread, by default if WORKER_ENV is set."""
         self._master = master
         self._size = size
         self._master.bind("<Key>", self.handle_keypress)
-        self._master.after(2*1000, self.step)
+
+        # every repeating callback runs through the scheduler, the timer
+        # catches up on missed seconds while late steps are dropped
+        self._scheduler = TickScheduler(self._master)
+        self._scheduler.add(STEP_CHAIN, STEP_SECONDS, self.step, SKIP)
+        self._scheduler.add(TIMER_CHAIN, TIMER_SECONDS, self.update_timer, CATCH_UP)
+        self._scheduler.start(STEP_CHAIN)
 
         self._timer_m = 0
         self._timer_s = 0
@@ -657,7 +670,23 @@ class AdvancedHackerController(HackerController):
         # initialize the game mode and store its grid including initializing the player entity
         self._game = Game(self._size)
         grid = self._game.get_grid()
-        grid.add_entity(Position(GRID_SIZE//2,0), Player())
+        grid.add_entity(self._game.get_player_position(), Player())
+
+        # record every input so the session can be replayed headlessly
+        self._journal = Journal(JOURNAL_FILE)
+        self._journal.start(self._game)
+        self._bot = None
+
+        # per-phase tick timings, dumped to PROFILE_FILE when the window closes
+        self._profiler = TickProfiler.from_environment()
+        self._master.bind("<Destroy>", self.handle_destroy, add="+")
+
+        # the time of the latest input not yet drawn, for measuring its latency
+        self._input_time = None
+        self._worker = None
+
+        # snapshots of the game before each step, newest last, for rewinding
+        self._history = deque(maxlen=REWIND_HISTORY)
 
         # draw the hacker title using Label
         self._hacker_lbl = tk.Label(self._master, text=TITLE, bg=TITLE_BG, font=TITLE_FONT, fg="WHITE")
@@ -668,103 +697,186 @@ class AdvancedHackerController(HackerController):
         self._frame.pack(side=tk.TOP)
 
         # initialize and draw the image game field, and it is in the frame:
-        self._game_field = ImageGameField(self._frame, self._size, MAP_WIDTH, MAP_HEIGHT, bg=FIELD_COLOUR)
+        field_class = CompositeGameField if composite_requested() else ImageGameField
+        self._game_field = field_class(self._frame, self._size, MAP_WIDTH, MAP_HEIGHT, bg=FIELD_COLOUR)
         self._game_field.pack(side=tk.LEFT)
         self._game_field.draw_grid(grid.get_entities())
 
         # initialize and draw the score bar, and it is in the frame:
-        self._score_bar = ScoreBar(self._frame, self._size, bg=SCORE_COLOUR)
+        self._score_bar = ScoreBar(self._frame, SCORE_ROWS, bg=SCORE_COLOUR)
         self._score_bar.pack(side=tk.LEFT)
-
-        self._text_id_1 = self._score_bar.create_text(SCORE_WIDTH/4*3, MAP_HEIGHT/GRID_SIZE*1.5, text=self._game.get_num_collected(), fill="white")
-        self._text_id_2 = self._score_bar.create_text(SCORE_WIDTH/4*3, MAP_HEIGHT/GRID_SIZE*2.5, text=self._game.get_num_destroyed(), fill="white")
+        self._score_bar.update_scores(self._game.get_num_collected(), self._game.get_num_destroyed())
 
         # initialize StatusBar
-        self._status_bar = StatusBar(self._master, self.update_timer)
+        self._status_bar = StatusBar(self._master, self.set_playing)
         self._status_bar.pack(side=tk.TOP)
-
-        if self._status_bar.get_pause_or_play():
-            self._master.after(1*1000, self.update_timer)
+        self.draw_profile()
+        self._scheduler.start(TIMER_CHAIN)
 
         # initialize the file menu
         self._file_menu = FileMenu(self._master, self.new_game, self.save_game, self.load_game)
         self._master.config(menu=self._file_menu)
 
+        if worker_requested() if use_worker is None else use_worker:
+            self.start_worker(REWIND_HISTORY)
+
     def new_game(self) -> None:
         """This method initializes a new game and apply it to current game."""
         # create an new empty game mode
-        self._game = Game(self._size)
+        game = Game(self._size)
 
         # initialize the player and draw the image game field, including the collected, destroyed and total shots.
-        self._game.get_grid().add_entity(Position(GRID_SIZE//2,0), Player())
-        self.draw(self._game)
+        game.get_grid().add_entity(game.get_player_position(), Player())
+        self.replace_game(game)
 
-        # initialize the timer and pause/play button.
+        # initialize the timer and pause/play button, and start both chains over
+        self._timer_m = 0
+        self._timer_s = 0
         self._status_bar._timer.config(text=f"0m 0s")
-        self._status_bar._pause_or_play = True
-        self._status_bar._pause_play_button.config(text="Pause")
+        self._status_bar.set_pause_or_play(True)
+        self._scheduler.start(STEP_CHAIN)
+        self._scheduler.start(TIMER_CHAIN)
+
+    def set_playing(self, playing: bool) -> None:
+        """Pause or resume both the steps and the timer, each continuing from
+        where it was paused.
+
+        Parameter:
+            playing: bool,
+            Whether the game should run
+        """
+        for chain in (STEP_CHAIN, TIMER_CHAIN):
+            if playing:
+                self._scheduler.resume(chain)
+            else:
+                self._scheduler.pause(chain)
+
+    def handle_keypress(self, event) -> None:
+        """Handles the keys of HackerController and the rewind key.
+
+        Parameter:
+            event: tkinter event,
+        """
+        if event.keysym.upper() == REWIND_KEY:
+            self._input_time = time.perf_counter()
+            self.rewind()
+
+        else:
+            super().handle_keypress(event)
+
+    def rewind(self) -> None:
+        """Return the game to how it was before its latest step, undoing the
+        step and every action taken since. Up to REWIND_HISTORY steps can be
+        rewound one after another."""
+        if self._worker is not None:
+            self._worker.submit(REWIND, input_time=self.take_input_time())
+            return
+
+        if not self._history:
+            return
+
+        self._game.restore(self._history.pop())
+        self._journal.record_rewind()
+        self.draw(self._game)
 
     def save_game(self) -> None:
         """This method saves the current game status including the timer, total shots,
         number of collected and destroyed, and the entitis' current position into
-        a nominated directory."""
+        a nominated directory, in the binary save format of a3_save."""
         # directory = tk.filedialog.askdirectory()
-        # with open(f"{directory}/save_game.txt", "w") as file:
-        with open(f"director_test_game_save.save", "w") as file:
-            file.write(f'time_m@{self._timer_m}')
-            file.write(f'\ntime_s@{self._timer_s}')
-            file.write(f'\ntotal_shots@{self._game.get_total_shots()}')
-            file.write(f'\ncollected@{self._game.get_num_collected()}')
-            file.write(f'\ndestroyed@{self._game.get_num_destroyed()}')
-            file.write(f'\nentities@{self._game.get_grid().get_entities()}')
+        # a3_save.save_game(f"{directory}/save_game.save", ...)
+        if self._worker is not None:
+            self._worker.submit(SAVE, SAVE_FILE, self._timer_m, self._timer_s)
+            return
+
+        a3_save.save_game(SAVE_FILE, self._game, self._timer_m, self._timer_s)
 
     def load_game(self) -> None:
         """This method loads the saved game file and apply it to current game."""
-        file = tk.filedialog.askopenfile()
+        path = tk.filedialog.askopenfilename()
+        if not path:
+            return
+
+        try:
+            saved = a3_save.load_game(path)
+        except (OSError, ValueError) as error:
+            messagebox.showerror("Load game", f"Could not load {path}: {error}")
+            return
 
-        # store the saved game information in a dict
-        saved_game_info = {}
-        for line in file:
-            key, value = line.split("@")
-            saved_game_info[key] = value.strip()
-        file.close()
+        size = saved.get_game().get_grid().get_size()
+        if size != self._size:
+            messagebox.showerror("Load game", f"{path} holds a {size}x{size} game, not {self._size}x{self._size}")
+            return
 
         # load the saved data of timer and apply them to current game
-        self._timer_m = int(saved_game_info["time_m"])
-        self._timer_s = int(saved_game_info["time_s"])
+        self._timer_m, self._timer_s = saved.get_timer()
         self._status_bar._timer.config(text=f"{self._timer_m}m {self._timer_s}s")
 
-        # load the saved data of total shots, collected, destroyed
-        self._game._total_shots = int(saved_game_info["total_shots"])
-        self._game._num_collected = int(saved_game_info["collected"])
-        self._game._num_destroyed = int(saved_game_info["destroyed"])
+        # load the saved game, including total shots, collected, destroyed and entities
+        self.replace_game(saved.get_game(), path)
 
-        # load the saved data of entities
-        self._game.get_grid()._entities = eval(saved_game_info["entities"])
+    def replace_game(self, game: Game, save_path: Optional[str] = None) -> None:
+        """Play a new or loaded game from now on, starting its journal and
+        forgetting the rewind history.
+
+        Parameters:
+            game: Game,
+            The game to play, with its player placed
+
+            save_path: str,
+            The save file the game was loaded from, if any
+        """
+        if self._worker is not None:
+            self._worker.submit(RESET, game, save_path)
+            return
+
+        self._game = game
+        self._journal.start(self._game, save_path)
+        self._history.clear()
 
         # apply loaded data to current game
         self.draw(self._game)
 
-    def draw(self, game: Game) -> None:
-        """Clears and redraws the view based on the current game state."""
+    def draw_frame(self, frame: GameFrame) -> None:
+        """Clears and redraws the view from a frame of the game, and records
+        the latency of the input it shows."""
         # draw a new image game field
-        self._game_field.draw_grid(game.get_grid().get_entities())
+        with self._profiler.phase('canvas'):
+            self._game_field.draw_grid(frame.get_entities())
+
+        # update the score numbers in place, and the number of total shots
+        with self._profiler.phase('score'):
+            self._score_bar.update_scores(frame.get_num_collected(), frame.get_num_destroyed())
+            self._status_bar.update_total_shots(frame.get_total_shots())
 
-        # for the score, delete the previous score number and draw the new one
-        self._score_bar.delete(self._text_id_1)
-        self._score_bar.delete(self._text_id_2)
+        if frame.get_input_time() is not None:
+            self._profiler.record('latency', time.perf_counter() - frame.get_input_time())
 
-        self._text_id_1 = self._score_bar.create_text(SCORE_WIDTH/4*3, MAP_HEIGHT/GRID_SIZE*1.5, text=self._game.get_num_collected(), fill="white")
-        self._text_id_2 = self._score_bar.create_text(SCORE_WIDTH/4*3, MAP_HEIGHT/GRID_SIZE*2.5, text=self._game.get_num_destroyed(), fill="white")
+    def handle_outcome(self, outcome: Optional[bool]) -> None:
+        """The advanced game plays on once it is won or lost."""
+        pass
 
-        # update the number of total shots
-        self._status_bar.update_total_shots(self._game.get_total_shots())
+    def draw_profile(self) -> None:
+        """Show the p50/p99 timings of each phase on the status bar while
+        profiling, and hide them otherwise."""
+        self._status_bar.show_profile(self._profiler.summary() if self._profiler.is_enabled() else None)
 
     def step(self):
-        """This method is called every 2 seconds and triggers the step method for
-        the game and updates the view accordingly."""
-        self._game.step()
+        """This method is called every 2 seconds by the scheduler and triggers
+        the step method for the game and updates the view accordingly."""
+        if self._worker is not None:
+            self._worker.submit(STEP)
+            return
+
+        if self._bot is not None:
+            self.play_bot_turn()
+        with self._profiler.phase('model'):
+            self._history.append(self._game.snapshot())
+            self._game.step()
+        with self._profiler.phase('journal'):
+            self._journal.record_step(self._game)
         self.draw(self._game)
+        self.draw_profile()
 
         # # controll the game and messagebox by win or lost
         # if self._game.has_won() is None:
@@ -778,35 +890,29 @@ class AdvancedHackerController(HackerController):
         #     if messagebox.showinfo("LOSE", "Sorry! You Lost!"):
         #         self._master.destroy()
 
-        # recursive
-        self._master.after(2*1000, self.step)
-
     def update_timer(self):
-        """This method is similarly to step, called every 1 second and triggers
-        the update_timer method for the game and updates the view accordingly
-        if the game is not paused."""
-        if self._status_bar.get_pause_or_play():
-            self._master.after(1*1000, self.update_timer)
-            self._timer_s += 1
-            if not self._timer_s % 60:
-                self._timer_m += 1
-                self._timer_s = 0
+        """This method is similarly to step, called by the scheduler every 1
+        second while the game is not paused, and counts the second on the timer."""
+        self._timer_s += 1
+        if not self._timer_s % 60:
+            self._timer_m += 1
+            self._timer_s = 0
 
         self._status_bar._timer.config(text=f"{self._timer_m}m {self._timer_s}s")
 
 class StatusBar(tk.Frame):
     """StatusBar inherits from tk.Frame."""
-    def __init__(self, master, update_timer, **kwargs):
+    def __init__(self, master, toggle_playing, **kwargs):
         """Displays a shot counter, a timer and a pause/play button.
 
         Parameters:
             master: master,
             The parent window
 
-            update_timer: method,
-            The purpose of this argument is for accessing the update_timer method
-            from AdvancedHackerController to implement the functionality of stopping
-            and continuing the time count through button toggle.
+            toggle_playing: method,
+            Called with whether the game should now run whenever the pause/play
+            button is toggled, so AdvancedHackerController can pause and resume
+            its steps and timer.
 
             **kwargs:
             Signifies that any additional named arguments supported by tk.Canvas
@@ -815,7 +921,7 @@ class StatusBar(tk.Frame):
         super().__init__(master, **kwargs)
         self._master = master
         self._pause_or_play = True
-        self._update_timer = update_timer
+        self._toggle_playing = toggle_playing
 
         # frame to contain total shots
         self._shots_frame = tk.Frame(master)
@@ -841,20 +947,32 @@ class StatusBar(tk.Frame):
         self._pause_play_button = tk.Button(master, text="Pause", width=5, command=self.button_toggle)
         self._pause_play_button.pack(side=tk.LEFT, expand=True)
 
+        # tick timings, only packed while profiling
+        self._profile = tk.Label(master, text="", font=('Courier', 9))
+
     def update_total_shots(self, total_shots: int) -> None:
         """Update the number of total shots."""
         self._total_shots.config(text=f"{total_shots}")
 
+    def show_profile(self, summary: Optional[str]) -> None:
+        """Show a summary of the tick timings, or hide it if summary is None."""
+        if summary is None:
+            self._profile.pack_forget()
+
+        else:
+            self._profile.config(text=summary)
+            if not self._profile.winfo_manager():
+                self._profile.pack(side=tk.LEFT, expand=True)
+
     def button_toggle(self) -> None:
         """Control the pause and play situation."""
-        if self._pause_or_play:
-            self._pause_play_button.config(text="Play")
-
-        elif not self._pause_or_play:
-            self._pause_play_button.config(text="Pause")
-            self._master.after(1*1000, self._update_timer)
+        self.set_pause_or_play(not self._pause_or_play)
+        self._toggle_playing(self._pause_or_play)
 
-        self._pause_or_play = not self._pause_or_play
+    def set_pause_or_play(self, pause_or_play: bool) -> None:
+        """Show the game as running (True) or paused (False)."""
+        self._pause_or_play = pause_or_play
+        self._pause_play_button.config(text="Pause" if pause_or_play else "Play")
 
     def get_pause_or_play(self) -> bool:
         """Return the current pause or play bool value."""
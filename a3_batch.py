@@ -0,0 +1,263 @@
+from a3_support import *
+import argparse
+import time
+
+import numpy as np
+
+PLAYER_CODE = TYPE_CODES[PLAYER]
+COLLECTABLE_CODE = TYPE_CODES[COLLECTABLE]
+DESTROYABLE_CODE = TYPE_CODES[DESTROYABLE]
+BLOCKER_CODE = TYPE_CODES[BLOCKER]
+BOMB_CODE = TYPE_CODES[BOMB]
+ENTITY_TYPE_CODES = np.array([TYPE_CODES[display] for display in ENTITY_TYPES], dtype=np.int8)
+CODE_DISPLAYS = {code: display for display, code in TYPE_CODES.items()}
+
+class BatchGame:
+    """BatchGame plays N independent games of the same size at once.
+
+    The boards are held as an (N, size, size) int8 array indexed by
+    [game, y, x] using the TYPE_CODES of each entity, and every operation is
+    applied to the whole batch with NumPy instead of looping over Game objects.
+    The per-game counters and outcomes are arrays of length N.
+
+    A finished game is frozen: later calls to step, rotate_grid and fire
+    leave its board and counters untouched."""
+    def __init__(self, count: int, size: int = GRID_SIZE, seed: Optional[int] = None) -> None:
+        """A batch is constructed with the number of games and the size of
+        each game's grid, with the player placed in the centre of the top row.
+
+        Parameters:
+            count: int,
+            The number of games in the batch
+
+            size: int,
+            The rows and cols of every grid
+
+            seed: int,
+            Seed of the random generator used for spawning entities
+        """
+        self._count = count
+        self._size = size
+        self._random = np.random.default_rng(seed)
+        self._games = np.arange(count)
+        self._player_x = size//2
+
+        self._boards = np.zeros((count, size, size), dtype=np.int8)
+        self._boards[:, 0, self._player_x] = PLAYER_CODE
+
+        self._num_collected = np.zeros(count, dtype=np.int32)
+        self._num_destroyed = np.zeros(count, dtype=np.int32)
+        self._total_shots = np.zeros(count, dtype=np.int32)
+        self._won = np.zeros(count, dtype=bool)
+        self._lost = np.zeros(count, dtype=bool)
+
+    def get_count(self) -> int:
+        """Return the number of games in the batch."""
+        return self._count
+
+    def get_size(self) -> int:
+        """Return the size of every grid in the batch."""
+        return self._size
+
+    def get_boards(self) -> np.ndarray:
+        """Return the (N, size, size) array of type codes indexed by [game, y, x]."""
+        return self._boards
+
+    def get_num_collected(self) -> np.ndarray:
+        """Return the total of Collectables acquired in each game."""
+        return self._num_collected
+
+    def get_num_destroyed(self) -> np.ndarray:
+        """Return the total of Destroyables removed with a shot in each game."""
+        return self._num_destroyed
+
+    def get_total_shots(self) -> np.ndarray:
+        """Return the total of shots taken in each game."""
+        return self._total_shots
+
+    def has_won(self) -> np.ndarray:
+        """Return a boolean array which is True for every game that was won."""
+        return self._won
+
+    def has_lost(self) -> np.ndarray:
+        """Return a boolean array which is True for every game that was lost."""
+        return self._lost
+
+    def get_active(self) -> np.ndarray:
+        """Return a boolean array which is True for every unfinished game."""
+        return ~(self._won | self._lost)
+
+    def _select(self, where: Optional[np.ndarray]) -> np.ndarray:
+        """Return the mask of unfinished games, restricted to where if given."""
+        active = self.get_active()
+        if where is not None:
+            active &= where
+        return active
+
+    def rotate_grid(self, direction: str, where: Optional[np.ndarray] = None) -> None:
+        """Rotate the field of every selected game one column in the given
+        direction, wrapping around the edges. The player row does not move.
+
+        Parameters:
+            direction: str,
+            LEFT or RIGHT
+
+            where: np.ndarray,
+            Optional boolean mask of the games to rotate, all games by default
+        """
+        selected = self._select(where)
+        offset_x = ROTATIONS[DIRECTIONS.index(direction)][0]
+        fields = self._boards[selected, 1:, :]
+        self._boards[selected, 1:, :] = np.roll(fields, offset_x, axis=2)
+
+    def generate_entities(self, where: Optional[np.ndarray] = None) -> None:
+        """Spawn entities into the bottom row of every selected game, drawn
+        from the same distribution as Game.generate_entities: up to size - 3
+        Collectables or Destroyables, a Blocker with a 1 in 4 chance and, for
+        TASK 3, otherwise a Bomb with a 1 in 4 chance, in distinct columns."""
+        selected = self._select(where)
+        count, size = self._count, self._size
+
+        entity_count = self._random.integers(0, size - 2, count)
+        blocker = self._random.integers(1, 5, count) % 4 == 0
+        if TASK == 3:
+            bomb = ~blocker & (self._random.integers(1, 5, count) % 4 == 0)
+        else:
+            bomb = np.zeros(count, dtype=bool)
+
+        # slot k of a game holds its k-th spawned entity and lands in column order[k]
+        slots = np.arange(size)[None, :]
+        codes = np.where(slots < entity_count[:, None],
+                         self._random.choice(ENTITY_TYPE_CODES, (count, size)), EMPTY_CODE)
+        codes[(slots == entity_count[:, None]) & blocker[:, None]] = BLOCKER_CODE
+        codes[(slots == (entity_count + blocker)[:, None]) & bomb[:, None]] = BOMB_CODE
+        order = np.argsort(self._random.random((count, size)), axis=1)
+
+        row = np.zeros((count, size), dtype=np.int8)
+        row[self._games[:, None], order] = codes
+        bottom = self._boards[:, size - 1, :]
+        self._boards[:, size - 1, :] = np.where(selected[:, None] & (row != EMPTY_CODE), row, bottom)
+
+    def step(self, where: Optional[np.ndarray] = None) -> None:
+        """Move every entity of each selected game up by one row, losing the
+        game if a Destroyable leaves the top of the field, then spawn new
+        entities into the bottom row."""
+        selected = self._select(where)
+        escaped = (self._boards[:, 1, :] == DESTROYABLE_CODE).any(axis=1)
+
+        fields = self._boards[selected]
+        fields[:, 1:-1, :] = fields[:, 2:, :]
+        fields[:, -1, :] = EMPTY_CODE
+        self._boards[selected] = fields
+
+        self._lost |= selected & escaped
+        self.generate_entities(selected)
+
+    def fire(self, shot_type: str, where: Optional[np.ndarray] = None) -> None:
+        """Fire a collect or destroy shot up the player's column in every
+        selected game. The shot hits the first entity in the column: a Blocker
+        stops it, a collect shot collects a Collectable, and a destroy shot
+        removes a Collectable, Destroyable or Bomb, with a Bomb also clearing
+        every SPLASH offset around it."""
+        selected = self._select(where)
+        self._total_shots += selected
+
+        column = self._boards[:, 1:, self._player_x]
+        occupied = column != EMPTY_CODE
+        target_y = occupied.argmax(axis=1) + 1
+        target = self._boards[self._games, target_y, self._player_x]
+        hit = selected & occupied.any(axis=1)
+
+        if shot_type == COLLECT:
+            collected = hit & (target == COLLECTABLE_CODE)
+            self._boards[collected, target_y[collected], self._player_x] = EMPTY_CODE
+            self._num_collected += collected
+            self._won |= collected & (self._num_collected >= COLLECTION_TARGET)
+
+        elif shot_type == DESTROY:
+            removed = hit & ((target == COLLECTABLE_CODE) | (target == DESTROYABLE_CODE) | (target == BOMB_CODE))
+            self._boards[removed, target_y[removed], self._player_x] = EMPTY_CODE
+            self._num_destroyed += hit & ((target == DESTROYABLE_CODE) | (target == BOMB_CODE))
+
+            bombed = self._games[hit & (target == BOMB_CODE)]
+            for offset_x, offset_y in SPLASH:
+                x = self._player_x + offset_x
+                if not 0 <= x < self._size:
+                    continue
+
+                y = target_y[bombed] + offset_y
+                inside = (0 <= y) & (y < self._size)
+                games, y = bombed[inside], y[inside]
+                splashed = self._boards[games, y, x]
+                self._num_destroyed[games] += splashed == DESTROYABLE_CODE
+
+                cleared = splashed != PLAYER_CODE
+                self._boards[games[cleared], y[cleared], x] = EMPTY_CODE
+
+    def serialise(self, index: int) -> Dict[Tuple[int, int], str]:
+        """Return the board of one game in the same format as Grid.serialise.
+
+        return:
+            Dict in format: {Tuple(int, int):str}
+        """
+        ys, xs = np.nonzero(self._boards[index])
+        return {(int(x), int(y)): CODE_DISPLAYS[int(self._boards[index, y, x])] for y, x in zip(ys, xs)}
+
+    def __repr__(self) -> str:
+        """Return a representation of this BatchGame."""
+        return f'BatchGame({self._count}, {self._size})'
+
+def play_random(batch: BatchGame, max_ticks: int, seed: Optional[int] = None) -> Tuple[int, int]:
+    """Drive every game in the batch with a uniformly random action followed by
+    a step each tick, until all games finish or max_ticks steps have run.
+
+    return:
+        Tuple(batch ticks run, game ticks summed over the unfinished games)
+    """
+    random = np.random.default_rng(seed)
+    actions = (LEFT, RIGHT, COLLECT, DESTROY, None)
+    ticks = game_ticks = 0
+    while ticks < max_ticks and batch.get_active().any():
+        game_ticks += int(batch.get_active().sum())
+        choice = random.integers(0, len(actions), batch.get_count())
+        for index, action in enumerate(actions):
+            if action in DIRECTIONS:
+                batch.rotate_grid(action, choice == index)
+
+            elif action in SHOT_TYPES:
+                batch.fire(action, choice == index)
+
+        batch.step()
+        ticks += 1
+    return ticks, game_ticks
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, float]:
+    """Play a batch of random games and report the batch throughput."""
+    parser = argparse.ArgumentParser(description='Play many Hacker games at once with NumPy.')
+    parser.add_argument('--games', type=int, default=100000)
+    parser.add_argument('--size', type=int, default=GRID_SIZE)
+    parser.add_argument('--max-ticks', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    batch = BatchGame(args.games, args.size, args.seed)
+    start = time.perf_counter()
+    ticks, game_ticks = play_random(batch, args.max_ticks, args.seed)
+    seconds = time.perf_counter() - start
+
+    report = {'games': args.games,
+              'ticks': ticks,
+              'wins': int(batch.has_won().sum()),
+              'losses': int(batch.has_lost().sum()),
+              'seconds': seconds,
+              'game_ticks': game_ticks,
+              'game_ticks_per_second': game_ticks/seconds if seconds else float('inf'),
+              'games_per_second': args.games/seconds if seconds else float('inf')}
+    print(f"{report['games']} games, {report['ticks']} batch ticks in {seconds:.3f}s "
+          f"(won {report['wins']}, lost {report['losses']})")
+    print(f"{report['game_ticks_per_second']:.0f} game ticks/s, {report['games_per_second']:.1f} games/s")
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+from a3_support import *
+from a3_model import *
+from a3_headless import BACKENDS
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import time
+import tracemalloc
+
+BENCH_FILE = "hacker_bench.json"
+BENCH_SIZES = (GRID_SIZE, 64, 256, 1024)
+BENCH_DENSITIES = (0.1, 0.5)
+FILL_TYPES = ENTITY_TYPES + (BLOCKER,)
+MIN_SECONDS = 0.2
+MAX_CALLS = 100000
+MEMORY_CALLS = 3
+XVFB_SCREEN = '1280x1024x24'
+
+def filled_game(size: int, density: float, grid_class: Optional[type] = None, seed: int = 0) -> Game:
+    """Return a seeded game with entities in a fixed sample of the given
+    fraction of its field cells. The cells are filled in row-major order, so
+    every insertion into the grid's sorted indexes is an append."""
+    game = Game(size, grid_class, seed)
+    grid = game.get_grid()
+    grid.add_entity(game.get_player_position(), Player())
+
+    rng = random.Random(seed)
+    cells = (size - 1)*size
+    for index in sorted(rng.sample(range(cells), int(cells*density))):
+        y, x = divmod(index, size)
+        grid.add_entity(Position(x, y + 1), game.create_entity(rng.choice(FILL_TYPES)))
+    return game
+
+def measure(make_state, operation, calls_per_round: int, prepare=None,
+            min_seconds: float = MIN_SECONDS, max_calls: int = MAX_CALLS) -> Tuple[float, int]:
+    """Time operation(state, index) until min_seconds of calls have run.
+
+    Each round starts from a fresh make_state() and makes at most
+    calls_per_round calls, so operations that use up their state (steps
+    emptying the board, shots emptying a column) are measured on a board of
+    the intended density. prepare(state, index), if given, runs untimed
+    before each call.
+
+    return:
+        Tuple(total seconds of the timed calls, number of calls)
+    """
+    seconds = 0.0
+    calls = 0
+    while seconds < min_seconds and calls < max_calls:
+        state = make_state()
+        for index in range(min(calls_per_round, max_calls - calls)):
+            if prepare is not None:
+                prepare(state, index)
+            start = time.perf_counter()
+            operation(state, index)
+            seconds += time.perf_counter() - start
+            calls += 1
+            if seconds >= min_seconds:
+                break
+    return seconds, calls
+
+def traced_state(make_state) -> Tuple[object, int]:
+    """Build a state, returning it with the bytes of Python memory it holds."""
+    tracemalloc.start()
+    try:
+        state = make_state()
+        return state, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+def peak_memory(state, operation, calls: int = MEMORY_CALLS, prepare=None) -> int:
+    """Return the peak bytes allocated by a few calls of the operation on
+    an already built state."""
+    tracemalloc.start()
+    try:
+        for index in range(calls):
+            if prepare is not None:
+                prepare(state, index)
+            operation(state, index)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def model_operations(size: int) -> Dict[str, tuple]:
+    """Return the model operations as (operation, calls per round, prepare,
+    whether the operation changes the board) keyed by their name."""
+    def rotate(game: Game, index: int) -> None:
+        game.rotate_grid(DIRECTIONS[index % 2])
+
+    def aim(game: Game, index: int) -> None:
+        game.rotate_grid(LEFT)
+
+    return {'Game.step': (lambda game, index: game.step(), size - 1, None, True),
+            'Game.fire': (lambda game, index: game.fire(SHOT_TYPES[index % 2]), 4*size, aim, True),
+            'Game.rotate_grid': (rotate, MAX_CALLS, None, False),
+            'Game.generate_entities': (lambda game, index: game.generate_entities(), MAX_CALLS, None, False),
+            # serialise() is memoized per version, so time the build behind it
+            'Grid.serialise': (lambda game, index: game.get_grid()._serialise(), MAX_CALLS, None, False)}
+
+def bench_model(sizes, densities, grid_class: type, min_seconds: float, report=None) -> List[Dict[str, object]]:
+    """Time and trace every model operation at each size and density."""
+    results = []
+    for size in sizes:
+        for density in densities:
+            fill = lambda: filled_game(size, density, grid_class)
+            shared, state_bytes = traced_state(fill)
+            for name, (operation, per_round, prepare, changes) in model_operations(size).items():
+                seconds, calls = measure(fill if changes else lambda: shared, operation, per_round,
+                                         prepare, min_seconds)
+                peak_bytes = peak_memory(fill() if changes else shared, operation, prepare=prepare)
+                results.append(result_entry(name, size, density, grid_class, seconds, calls,
+                                            state_bytes, peak_bytes))
+                if report is not None:
+                    report(results[-1])
+    return results
+
+def bench_compositor(sizes, densities, grid_class: type, min_seconds: float, report=None) -> List[Dict[str, object]]:
+    """Time and trace FrameCompositor.render, which needs no display,
+    alternating between the frames before and after a step like the canvas
+    benchmarks do."""
+    from a3_composite import FrameCompositor
+    from a3_sprites import SpriteAtlas
+
+    atlas = SpriteAtlas()
+    results = []
+    for size in sizes:
+        for density in densities:
+            game = filled_game(size, density, grid_class)
+            before = game.get_grid().get_entities()
+            game.step()
+            frames = (before, game.get_grid().get_entities())
+
+            def render(compositor: FrameCompositor, index: int) -> None:
+                compositor.render(frames[index % 2])
+
+            def build() -> FrameCompositor:
+                compositor = FrameCompositor(size, MAP_WIDTH, MAP_HEIGHT, atlas.get_scaled)
+                render(compositor, 0)
+                return compositor
+
+            compositor, state_bytes = traced_state(build)
+            seconds, calls = measure(lambda: compositor, render, MAX_CALLS, min_seconds=min_seconds)
+            peak_bytes = peak_memory(compositor, render)
+            results.append(result_entry('FrameCompositor.render', size, density, grid_class,
+                                        seconds, calls, state_bytes, peak_bytes))
+            if report is not None:
+                report(results[-1])
+    return results
+
+@contextlib.contextmanager
+def virtual_display():
+    """Run the enclosed block under a fresh Xvfb server, which also works
+    when a display is already available so canvas timings are not skewed
+    by a desktop compositor. Yields the DISPLAY used.
+
+    Raises RuntimeError if Xvfb is not installed or does not start."""
+    xvfb = shutil.which('Xvfb')
+    if xvfb is None:
+        raise RuntimeError('Xvfb is not installed')
+
+    number = next(number for number in range(99, 200) if not os.path.exists(f'/tmp/.X11-unix/X{number}')
+                  and not os.path.exists(f'/tmp/.X{number}-lock'))
+    display = f':{number}'
+    server = subprocess.Popen([xvfb, display, '-screen', '0', XVFB_SCREEN, '-nolisten', 'tcp'],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 10
+        while not os.path.exists(f'/tmp/.X11-unix/X{number}'):
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f'Xvfb did not start on {display}')
+            time.sleep(0.05)
+
+        previous = os.environ.get('DISPLAY')
+        os.environ['DISPLAY'] = display
+        try:
+            yield display
+        finally:
+            if previous is None:
+                os.environ.pop('DISPLAY', None)
+            else:
+                os.environ['DISPLAY'] = previous
+    finally:
+        server.terminate()
+        server.wait()
+
+def bench_canvas(sizes, densities, grid_class: type, min_seconds: float, report=None) -> List[Dict[str, object]]:
+    """Time and trace the draw_grid of GameField, ImageGameField and
+    CompositeGameField, alternating between the frames before and after a step so every call
+    redraws a changed board. Only the Python side of the canvas memory is
+    traced. Must be called with a display available."""
+    import tkinter as tk
+    from a3 import GameField, ImageGameField, CompositeGameField
+
+    root = tk.Tk()
+    results = []
+    try:
+        for size in sizes:
+            for density in densities:
+                game = filled_game(size, density, grid_class)
+                before = game.get_grid().get_entities()
+                game.step()
+                frames = (before, game.get_grid().get_entities())
+
+                for field_class in (GameField, ImageGameField, CompositeGameField):
+                    def draw(field: GameField, index: int) -> None:
+                        field.draw_grid(frames[index % 2])
+                        field.update_idletasks()
+
+                    def build() -> GameField:
+                        field = field_class(root, size, MAP_WIDTH, MAP_HEIGHT, bg=FIELD_COLOUR)
+                        field.pack()
+                        draw(field, 0)
+                        return field
+
+                    field, state_bytes = traced_state(build)
+                    seconds, calls = measure(lambda: field, draw, MAX_CALLS, min_seconds=min_seconds)
+                    peak_bytes = peak_memory(field, draw)
+                    field.destroy()
+
+                    results.append(result_entry(f'{field_class.__name__}.draw_grid', size, density, grid_class,
+                                                seconds, calls, state_bytes, peak_bytes))
+                    if report is not None:
+                        report(results[-1])
+    finally:
+        root.destroy()
+    return results
+
+def result_entry(name: str, size: int, density: float, grid_class: type, seconds: float, calls: int,
+                 state_bytes: int, peak_bytes: int) -> Dict[str, object]:
+    """Return the machine-readable record of one benchmark."""
+    return {'operation': name,
+            'size': size,
+            'density': density,
+            'backend': grid_class.__name__,
+            'calls': calls,
+            'mean_us': seconds/calls*1e6 if calls else None,
+            'state_kib': state_bytes/1024,
+            'peak_kib': peak_bytes/1024}
+
+def git_revision() -> Optional[str]:
+    """Return the commit the benchmarked tree is at, if it is a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline: Dict[str, object], current: Dict[str, object]) -> List[str]:
+    """Return a line per benchmark found in both runs, giving the ratio of
+    the current mean time to the baseline one."""
+    key = lambda result: (result['operation'], result['size'], result['density'], result['backend'])
+    previous = {key(result): result for result in baseline['results']}
+    lines = []
+    for result in current['results']:
+        old = previous.get(key(result))
+        if old and old['mean_us'] and result['mean_us']:
+            lines.append(f"{result['operation']:>28} size {result['size']:>5} density {result['density']:<4} "
+                         f"{old['mean_us']:>12.2f} -> {result['mean_us']:>12.2f} us "
+                         f"x{result['mean_us']/old['mean_us']:.2f}")
+    return lines
+
+def print_result(result: Dict[str, object]) -> None:
+    """Print one benchmark record as it finishes."""
+    print(f"{result['operation']:>28} size {result['size']:>5} density {result['density']:<4} "
+          f"{result['mean_us']:>12.2f} us over {result['calls']:>6} calls, "
+          f"state {result['state_kib']:>10.1f} KiB, peak {result['peak_kib']:>9.1f} KiB", flush=True)
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, object]:
+    """Run the benchmark suite and write its results as JSON."""
+    parser = argparse.ArgumentParser(description='Benchmark the Hacker model and view hot paths.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(BENCH_SIZES))
+    parser.add_argument('--densities', type=float, nargs='+', default=list(BENCH_DENSITIES))
+    parser.add_argument('--backend', choices=tuple(BACKENDS), default='dict')
+    parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS, help='timed seconds per benchmark')
+    parser.add_argument('--no-canvas', action='store_true', help='skip the canvas benchmarks')
+    parser.add_argument('--output', default=BENCH_FILE, help='JSON file the results are written to')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON results of an earlier run to compare with')
+    args = parser.parse_args(argv)
+
+    grid_class = BACKENDS[args.backend]
+    run = {'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+           'revision': git_revision(),
+           'python': platform.python_version(),
+           'platform': platform.platform(),
+           'task': TASK,
+           'min_seconds': args.min_seconds,
+           'results': bench_model(args.sizes, args.densities, grid_class, args.min_seconds, print_result)}
+    run['results'] += bench_compositor(args.sizes, args.densities, grid_class, args.min_seconds, print_result)
+
+    if not args.no_canvas:
+        try:
+            with virtual_display():
+                run['results'] += bench_canvas(args.sizes, args.densities, grid_class, args.min_seconds,
+                                               print_result)
+        except RuntimeError as error:
+            run['canvas_skipped'] = str(error)
+            print(f"canvas benchmarks skipped: {error}")
+
+    with open(args.output, 'w') as file:
+        json.dump(run, file, indent=1)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            for line in compare(json.load(file), run):
+                print(line)
+    return run
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+from a3_support import *
+from a3_model import *
+import argparse
+import time
+
+# every kind that moves with the field gets a mask; players are pinned instead
+BITBOARD_KINDS = tuple(rules.display for rules in ENTITY_RULES if rules is not None and not rules.pinned)
+LOSING_KINDS = tuple(rules.display for rules in ENTITY_RULES if rules is not None and rules.loses_at_top)
+
+class BitboardGrid(AbstractGrid):
+    """A Grid which stores each kind of entity as an integer bitmask over the
+    size*size cells, where bit (y*size + x) is set when an entity of that kind
+    is at Position(x, y). Players never move, so they are kept in the pinned
+    dictionary instead.
+
+    Stepping is a right shift by one row and rotating is a per-row bit rotate,
+    so neither allocates a Position per entity. The masks grow with size
+    squared, though, so this only pays off on small boards: stepping beats
+    Grid up to a size of about 64, rotating and firing are slower at every
+    size, and from about 128 up every operation is slower."""
+    def __init__(self, size: int) -> None:
+        """A bitboard grid is constructed with a size representing the number
+        of rows (equal to the number of columns) in the grid. Initially a grid
+        does not contain any entities."""
+        super().__init__(size)
+        self._masks = dict.fromkeys(BITBOARD_KINDS, 0)
+        self._kind_entities = {kind: SHARED_ENTITIES[kind] for kind in BITBOARD_KINDS}
+
+        row = (1 << size) - 1
+        self._board = (1 << size*size) - 1
+        self._field = self._board & ~row
+        self._top_row = row << size
+        self._first_column = sum(1 << y*size for y in range(size))
+        self._last_column = self._first_column << (size - 1)
+        self._column_masks = [self._first_column << x for x in range(size)]
+
+    def _bit(self, position: Position) -> int:
+        """Return the single-bit mask of a position inside the grid."""
+        return 1 << (position.get_y()*self._size + position.get_x())
+
+    def _positions(self, mask: int):
+        """Yield the (x, y) coordinates of every bit set in the mask."""
+        while mask:
+            low = mask & -mask
+            y, x = divmod(low.bit_length() - 1, self._size)
+            yield x, y
+            mask ^= low
+
+    def _place(self, position: Position, entity: Entity) -> None:
+        """Set the bit of a non-player entity at an empty position inside the field."""
+        self._masks[entity.display()] |= self._bit(position)
+        self._field_hash = self._hash_keys.add(self._field_hash, entity.display(),
+                                               position.get_x(), position.get_y())
+
+    def get_entities(self) -> Dict[Position, Entity]:
+        """Return a new dictionary of all entities in the grid.
+
+        return:
+            Dict in format: {Position:Entity}
+        """
+        entities = dict(self._pinned)
+        for kind, mask in self._masks.items():
+            entity = self._kind_entities[kind]
+            for x, y in self._positions(mask):
+                entities[Position(x, y)] = entity
+        return entities
+
+    def get_entity(self, position: Position) -> Optional[Entity]:
+        """Return a entity from the grid at a specific position or None if
+        the position does not have a mapped entity."""
+        if position in self._pinned:
+            return self._pinned[position]
+
+        if not self.in_bounds(position):
+            return None
+
+        bit = self._bit(position)
+        for kind, mask in self._masks.items():
+            if mask & bit:
+                return self._kind_entities[kind]
+        return None
+
+    def _unplace(self, position: Position) -> None:
+        """Clear the bit of the entity known to be at a position inside the field."""
+        bit = self._bit(position)
+        for kind in BITBOARD_KINDS:
+            if self._masks[kind] & bit:
+                self._masks[kind] ^= bit
+                self._field_hash = self._hash_keys.remove(self._field_hash, kind,
+                                                          position.get_x(), position.get_y())
+
+    def _serialise(self) -> Dict[Tuple[int, int], str]:
+        """Return a new mapping of (x, y) tuples to the display character of
+        the entity at that position."""
+        serialised = {(position.get_x(), position.get_y()): entity.display()
+                      for position, entity in self._pinned.items()}
+        for kind, mask in self._masks.items():
+            for x, y in self._positions(mask):
+                serialised[(x, y)] = kind
+        return serialised
+
+    def first_in_column(self, x: int) -> Optional[Position]:
+        """Return the position of the first entity below the player row in
+        column x, or None if the column is empty."""
+        column = self._column_masks[x]
+        occupied = 0
+        for mask in self._masks.values():
+            occupied |= mask & column
+
+        if not occupied:
+            return None
+        return self._position_pool.get(x, ((occupied & -occupied).bit_length() - 1)//self._size)
+
+    def count_entities(self, display: str) -> int:
+        """Return the number of entities on the grid whose display character
+        is the given one."""
+        if display in self._masks:
+            return self._masks[display].bit_count()
+        return sum(entity.display() == display for entity in self._pinned.values())
+
+    def get_lowest_destroyable(self) -> Optional[Position]:
+        """Return the position of the Destroyable closest to the player row
+        (the leftmost one if several share that row), or None if there is none."""
+        mask = 0
+        for kind in LOSING_KINDS:
+            mask |= self._masks[kind]
+        if not mask:
+            return None
+        y, x = divmod((mask & -mask).bit_length() - 1, self._size)
+        return Position(x, y)
+
+    def step(self) -> bool:
+        """Shift every row up by one, dropping the top row of the field.
+
+        return:
+            True if a Destroyable was moved off the top of the field.
+        """
+        destroyable_escaped = any(self._masks[kind] & self._top_row for kind in LOSING_KINDS)
+        removed = {}
+        for kind, mask in self._masks.items():
+            for x, y in self._positions(mask & self._top_row):
+                self._field_hash = self._hash_keys.remove(self._field_hash, kind, x, y)
+                removed[(x, y)] = kind
+            self._masks[kind] = (mask >> self._size) & self._field
+        self._field_hash = self._hash_keys.step(self._field_hash)
+        self._publish(removed=removed, shift=(0, -1))
+        return destroyable_escaped
+
+    def rotate_grid(self, direction: str) -> None:
+        """Rotate every row one column in the given direction, wrapping the
+        bits that fall off one edge around to the other."""
+        offset_x = ROTATIONS[DIRECTIONS.index(direction)][0]
+        wrap = self._size - 1
+        for kind, mask in self._masks.items():
+            if offset_x > 0:
+                mask = ((mask << 1) & (self._board ^ self._first_column)) | ((mask >> wrap) & self._first_column)
+            else:
+                mask = ((mask >> 1) & (self._board ^ self._last_column)) | ((mask << wrap) & self._last_column)
+            self._masks[kind] = mask
+        self._field_hash = self._hash_keys.rotate(self._field_hash, offset_x)
+        self._publish(shift=(offset_x, 0))
+
+    def snapshot(self) -> GridSnapshot:
+        """Return an immutable snapshot of the grid. The masks are integers,
+        so copying them takes one pointer per kind."""
+        state = (dict(self._masks), dict(self._pinned), self._field_hash, self._pinned_hash)
+        return GridSnapshot(type(self), self._size, state)
+
+    def restore(self, snapshot: GridSnapshot) -> None:
+        """Return the grid to the state of a snapshot it took."""
+        state = self._check_snapshot(snapshot)
+        before = self.serialise() if self._subscribers else None
+        masks, pinned, self._field_hash, self._pinned_hash = state
+        self._masks = dict(masks)
+        self._pinned = dict(pinned)
+        self._publish_restore(before)
+
+def benchmark_operations(grid_class: type, size: int, repeat: int, seed: int) -> Dict[str, float]:
+    """Time Game.step(), Game.rotate_grid() and Game.fire() on the given grid
+    backend, returning the mean microseconds per call of each."""
+    from a3_headless import new_game
+
+    game = new_game(size, grid_class, seed)
+    for _ in range(size):
+        game.step()
+
+    timings = {}
+    operations = {'step': game.step,
+                  'rotate_grid': lambda: (game.rotate_grid(LEFT), game.rotate_grid(RIGHT)),
+                  'fire': lambda: (game.fire(DESTROY), game.fire(COLLECT))}
+    for name, operation in operations.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            operation()
+        calls = repeat if name == 'step' else repeat*2
+        timings[name] = (time.perf_counter() - start)/calls*1e6
+    return timings
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Compare the dictionary and bitboard grid backends."""
+    from a3_headless import RandomPolicy, run
+
+    parser = argparse.ArgumentParser(description='Benchmark BitboardGrid against Grid.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[GRID_SIZE, 16, 64])
+    parser.add_argument('--repeat', type=int, default=2000)
+    parser.add_argument('--games', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    backends = (('dict', Grid), ('bitboard', BitboardGrid))
+    print(f"{'size':>5} {'backend':>9} {'step us':>9} {'rotate us':>10} {'fire us':>9}")
+    for size in args.sizes:
+        for name, grid_class in backends:
+            timings = benchmark_operations(grid_class, size, args.repeat, args.seed)
+            print(f"{size:>5} {name:>9} {timings['step']:>9.2f} {timings['rotate_grid']:>10.2f} {timings['fire']:>9.2f}")
+
+    for name, grid_class in backends:
+        report = run(lambda index: RandomPolicy(2, args.seed + index), args.games,
+                     GRID_SIZE, grid_class=grid_class, seed=args.seed)
+        print(f"{name:>9}: {report['ticks_per_second']:.0f} ticks/s, {report['games_per_second']:.1f} games/s")
+
+
+if __name__ == '__main__':
+    main()
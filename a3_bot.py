@@ -0,0 +1,302 @@
+from a3_support import *
+from a3_model import *
+import argparse
+import random
+import time
+from collections import OrderedDict
+
+DEFAULT_DEPTH = 3
+DEFAULT_SAMPLES = 2
+DEFAULT_SHOTS_PER_TICK = 2
+DEFAULT_TABLE_SIZE = 200000
+
+WIN_SCORE = 1e6
+LOSS_SCORE = -1e6
+COLLECTED_WEIGHT = 100.0
+DESTROYED_WEIGHT = 10.0
+DANGER_WEIGHT = 40.0
+COLLECTABLE_WEIGHT = 5.0
+
+COLLECTABLE_CODE = TYPE_CODES[COLLECTABLE]
+DESTROYABLE_CODE = TYPE_CODES[DESTROYABLE]
+BLOCKER_CODE = TYPE_CODES[BLOCKER]
+BOMB_CODE = TYPE_CODES[BOMB]
+
+def encode_state(game: Game) -> Tuple[bytes, int, int]:
+    """Return the compact state of a game used by the bot: the type codes of
+    the field (rows 1 to size - 1, row-major) and the collected and destroyed
+    counters. The player row is left out as the player never moves."""
+    size = game.get_grid().get_size()
+    field = bytearray((size - 1)*size)
+    for (x, y), display in game.get_grid().serialise().items():
+        if 1 <= y < size:
+            field[(y - 1)*size + x] = TYPE_CODES[display]
+    return bytes(field), game.get_num_collected(), game.get_num_destroyed()
+
+def sample_spawn_row(rng: random.Random, size: int) -> bytes:
+    """Draw a bottom row of type codes from the same distribution as
+    Game.generate_entities."""
+    entity_count = rng.randint(0, size - 3)
+    entities = [TYPE_CODES[display] for display in rng.choices(ENTITY_TYPES, k=entity_count)]
+
+    blocker = rng.randint(1, 4) % 4 == 0
+    if blocker:
+        entities.append(BLOCKER_CODE)
+    elif TASK == 3 and rng.randint(1, 4) % 4 == 0:
+        entities.append(BOMB_CODE)
+
+    row = bytearray(size)
+    for column, code in zip(rng.sample(range(size), len(entities)), entities):
+        row[column] = code
+    return bytes(row)
+
+class ExpectimaxBot:
+    """ExpectimaxBot plans the actions of a game for one tick by expectimax search.
+
+    Rotating the field is free and never changes which shots are possible, so
+    the search works on the unrotated field and a move is a shot at the first
+    entity of any column: collecting a Collectable or destroying a Destroyable
+    or Bomb. Up to shots_per_tick shots are taken before the game steps, and
+    each step is a chance node averaged over spawn rows sampled from the
+    distribution of Game.generate_entities.
+
+    The values of chance nodes are kept in a bounded LRU transposition table
+    keyed by the compact encoding of the field, the counters and the depth
+    left. The spawn rows of a chance node are sampled from a generator seeded
+    by that key, so its value only depends on the key and is reused by every
+    branch, and every later decision, that reaches the same state. The board
+    size is taken from each game planned."""
+    def __init__(self, depth: int = DEFAULT_DEPTH, samples: int = DEFAULT_SAMPLES,
+                 shots_per_tick: int = DEFAULT_SHOTS_PER_TICK, table_size: int = DEFAULT_TABLE_SIZE,
+                 seed: Optional[int] = None) -> None:
+        """
+        Parameters:
+            depth: int,
+            The number of ticks searched
+
+            samples: int,
+            The number of spawn rows sampled at every chance node
+
+            shots_per_tick: int,
+            The most shots the bot takes between two steps
+
+            table_size: int,
+            The largest number of chance nodes kept in the transposition table
+
+            seed: int,
+            Seed of the generator the spawn rows are sampled from
+        """
+        self._size = None
+        self._depth = depth
+        self._samples = samples
+        self._shots_per_tick = shots_per_tick
+        self._table_size = table_size
+        self._table = OrderedDict()
+        self._salt = random.Random(seed).getrandbits(64).to_bytes(8, 'little')
+
+        self._nodes = 0
+        self._hits = 0
+        self._lookups = 0
+        self._seconds = 0.0
+        self._slowest = 0.0
+        self._decisions = 0
+
+    def plan(self, game: Game) -> List[str]:
+        """Return the rotations and shots to take in the game before its next step."""
+        start = time.perf_counter()
+        size = self._size = game.get_grid().get_size()
+        player_x = game.get_player_position().get_x()
+        field, collected, destroyed = encode_state(game)
+
+        actions = []
+        rotation = 0
+        shots_left, min_column = self._shots_per_tick, 0
+        while shots_left:
+            _, move = self._best_move(field, collected, destroyed, self._depth, shots_left, min_column)
+            if move is None:
+                break
+
+            # bring the column in front of the player the shorter way round
+            column, shot_type = move
+            offset = (player_x - column - rotation) % size
+            if offset <= size//2:
+                actions.extend([RIGHT]*offset)
+            else:
+                actions.extend([LEFT]*(size - offset))
+            rotation += offset
+            actions.append(shot_type)
+
+            field, collected, destroyed = self._fire(field, column, shot_type, collected, destroyed)
+            if collected >= COLLECTION_TARGET:
+                break
+            shots_left, min_column = shots_left - 1, column
+
+        seconds = time.perf_counter() - start
+        self._seconds += seconds
+        self._slowest = max(self._slowest, seconds)
+        self._decisions += 1
+        return actions
+
+    def _moves(self, field: bytes, min_column: int) -> List[Tuple[int, str]]:
+        """Return the useful shots from min_column rightwards. Destroying a
+        Collectable is never better than collecting it, and a shot at a
+        Blocker or an empty column changes nothing."""
+        size = self._size
+        moves = []
+        for column in range(min_column, size):
+            for index in range(column, len(field), size):
+                code = field[index]
+                if code == COLLECTABLE_CODE:
+                    moves.append((column, COLLECT))
+
+                elif code == DESTROYABLE_CODE or code == BOMB_CODE:
+                    moves.append((column, DESTROY))
+
+                if code:
+                    break
+        return moves
+
+    def _fire(self, field: bytes, column: int, shot_type: str, collected: int,
+              destroyed: int) -> Tuple[bytes, int, int]:
+        """Return the field and counters after a useful shot at a column,
+        following Game.fire."""
+        size = self._size
+        index = column
+        while not field[index]:
+            index += size
+
+        cells = bytearray(field)
+        code = cells[index]
+        cells[index] = EMPTY_CODE
+        if shot_type == COLLECT:
+            return bytes(cells), collected + 1, destroyed
+
+        destroyed += 1
+        if code == BOMB_CODE:
+            # the player faces the bomb from the centre, so the splash wraps in the unrotated field
+            y = index//size
+            for offset_x, offset_y in SPLASH:
+                splash_y = y + offset_y
+                if 0 <= splash_y < len(field)//size:
+                    splashed = splash_y*size + (column + offset_x) % size
+                    destroyed += cells[splashed] == DESTROYABLE_CODE
+                    cells[splashed] = EMPTY_CODE
+        return bytes(cells), collected, destroyed
+
+    def _evaluate(self, field: bytes, collected: int, destroyed: int) -> float:
+        """Score a state that is not searched any deeper: the counters, less
+        the danger of every Destroyable, which grows as it nears the top."""
+        size = self._size
+        score = COLLECTED_WEIGHT*collected + DESTROYED_WEIGHT*destroyed
+        for index, code in enumerate(field):
+            if code == DESTROYABLE_CODE:
+                score -= DANGER_WEIGHT/(index//size + 1)
+
+            elif code == COLLECTABLE_CODE:
+                score += COLLECTABLE_WEIGHT/(index//size + 1)
+        return score
+
+    def _step_value(self, field: bytes, collected: int, destroyed: int, depth: int) -> float:
+        """Return the expected value of stepping, averaged over spawns sampled
+        from a generator seeded by the state, looking it up in the
+        transposition table first."""
+        size = self._size
+        if DESTROYABLE_CODE in field[:size]:
+            return LOSS_SCORE - depth
+
+        shifted = field[size:]
+        if depth <= 1:
+            return self._evaluate(shifted + bytes(size), collected, destroyed)
+
+        self._lookups += 1
+        key = (field, collected, destroyed, depth)
+        if key in self._table:
+            self._hits += 1
+            self._table.move_to_end(key)
+            return self._table[key]
+
+        rng = random.Random(self._salt + field + f'{collected} {destroyed} {depth}'.encode())
+        total = 0.0
+        for _ in range(self._samples):
+            row = sample_spawn_row(rng, size)
+            total += self._best_move(shifted + row, collected, destroyed, depth - 1, self._shots_per_tick, 0)[0]
+        value = total/self._samples
+
+        self._table[key] = value
+        if len(self._table) > self._table_size:
+            self._table.popitem(last=False)
+        return value
+
+    def _best_move(self, field: bytes, collected: int, destroyed: int, depth: int, shots_left: int,
+                   min_column: int) -> Tuple[float, Optional[Tuple[int, str]]]:
+        """Return the value of a state and its best move, or None if the best
+        move is to let the game step. Shots within a tick are searched in
+        column order so the same set of shots is only tried once."""
+        self._nodes += 1
+        best = (self._step_value(field, collected, destroyed, depth), None)
+        if shots_left:
+            for move in self._moves(field, min_column):
+                next_field, next_collected, next_destroyed = self._fire(field, *move, collected, destroyed)
+                if next_collected >= COLLECTION_TARGET:
+                    value = WIN_SCORE + depth
+                else:
+                    value = self._best_move(next_field, next_collected, next_destroyed, depth,
+                                            shots_left - 1, move[0])[0]
+                if value > best[0]:
+                    best = (value, move)
+        return best
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return the nodes searched, nodes/second, transposition table size
+        and hit rate, and the mean and slowest seconds per decision so far."""
+        return {'nodes': self._nodes,
+                'nodes_per_second': self._nodes/self._seconds if self._seconds else 0.0,
+                'table_entries': len(self._table),
+                'table_hit_rate': self._hits/self._lookups if self._lookups else 0.0,
+                'decisions': self._decisions,
+                'seconds_per_decision': self._seconds/self._decisions if self._decisions else 0.0,
+                'slowest_decision': self._slowest}
+
+class BotPolicy:
+    """A policy for the headless and Monte Carlo runners which takes the
+    actions the bot plans every tick."""
+    def __init__(self, seed: Optional[int] = None, depth: int = DEFAULT_DEPTH) -> None:
+        self._bot = ExpectimaxBot(depth=depth, seed=seed)
+
+    def __call__(self, game: Game) -> List[str]:
+        """Return the actions to apply before the next step of the game."""
+        return self._bot.plan(game)
+
+    def get_bot(self) -> ExpectimaxBot:
+        """Return the bot making the decisions."""
+        return self._bot
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, float]:
+    """Play headless games with the bot and report its search statistics."""
+    from a3_headless import new_game, play_game
+
+    parser = argparse.ArgumentParser(description='Play Hacker with the expectimax bot.')
+    parser.add_argument('--games', type=int, default=5)
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH)
+    parser.add_argument('--max-ticks', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    policy = BotPolicy(args.seed, args.depth)
+    wins = 0
+    for index in range(args.games):
+        ticks, outcome = play_game(new_game(GRID_SIZE, seed=args.seed + index), policy, args.max_ticks)
+        wins += bool(outcome)
+        print(f"game {index}: {'won' if outcome else 'lost' if outcome is not None else 'unfinished'} "
+              f"after {ticks} ticks")
+
+    stats = policy.get_bot().get_stats()
+    print(f"won {wins}/{args.games} at depth {args.depth}")
+    print(f"{stats['seconds_per_decision']*1e3:.1f} ms/decision (slowest {stats['slowest_decision']*1e3:.1f} ms), "
+          f"{stats['nodes_per_second']:.0f} nodes/s, "
+          f"table hit rate {stats['table_hit_rate']:.1%} ({stats['table_entries']} entries)")
+    return stats
+
+
+if __name__ == '__main__':
+    main()
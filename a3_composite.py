@@ -0,0 +1,103 @@
+from a3_support import *
+from a3_model import *
+import os
+from PIL import Image
+
+def composite_requested() -> bool:
+    """Return whether the RENDER_ENV variable asks for the composited field."""
+    return os.environ.get(RENDER_ENV, '') == COMPOSITE_RENDER
+
+class FrameCompositor:
+    """FrameCompositor paints a whole game field into one Pillow image: the
+    player area, the field background and a sprite in every occupied cell.
+
+    The image is kept between frames and only the cells whose entity changed
+    since the previous render are repainted. Each sprite, scaled to its cell,
+    is composited over the cell's background once and the resulting tile is
+    cached, so repainting a cell is a single opaque paste. Cell edges
+    are rounded to whole pixels; cells narrower than a pixel are not drawn."""
+    def __init__(self, size: int, width: int, height: int, sprite_image) -> None:
+        """
+        Parameters:
+            size: int,
+            The rows and cols of the grid, size=rows=cols
+
+            width, height: int,
+            The size of the image in pixels
+
+            sprite_image: function,
+            Returns the Pillow image of the entity with a given display
+            character scaled to a given (width, height), such as
+            SpriteAtlas.get_scaled
+        """
+        self._size = size
+        self._sprite_image = sprite_image
+        self._xs = [round(x*width/size) for x in range(size + 1)]
+        self._ys = [round(y*height/size) for y in range(size + 1)]
+        self._tiles = {}
+        self._frame = {}
+        self._painted = 0
+
+        self._buffer = Image.new('RGB', (width, height), FIELD_COLOUR)
+        self._buffer.paste(PLAYER_AREA, (0, 0, width, self._ys[1]))
+
+    def render(self, entities: Dict[Position, Entity]) -> Image.Image:
+        """Repaint the cells that changed since the last render and return the
+        image, which is the same object every time.
+
+        Parameter:
+            entities: Dict[Position, Entity],
+            The dictionary of all entities from instance of Grid class.
+        """
+        frame = {(position.get_x(), position.get_y()): entity.display() for position, entity in entities.items()}
+        painted = 0
+        for cell, display in frame.items():
+            if self._frame.get(cell) != display:
+                self._paint(cell, display)
+                painted += 1
+
+        for cell in self._frame.keys() - frame.keys():
+            self._paint(cell, None)
+            painted += 1
+
+        self._frame = frame
+        self._painted = painted
+        return self._buffer
+
+    def _paint(self, cell: Tuple[int, int], display: Optional[str]) -> None:
+        """Paint one cell with the tile of an entity, or with its background
+        if display is None."""
+        x, y = cell
+        if not (0 <= x < self._size and 0 <= y < self._size):
+            return
+
+        box = (self._xs[x], self._ys[y], self._xs[x + 1], self._ys[y + 1])
+        cell_size = (box[2] - box[0], box[3] - box[1])
+        if not cell_size[0] or not cell_size[1]:
+            return
+
+        background = PLAYER_AREA if y == 0 else FIELD_COLOUR
+        if display is None:
+            self._buffer.paste(background, box)
+        else:
+            self._buffer.paste(self._tile(display, cell_size, background), box[:2])
+
+    def _tile(self, display: str, cell_size: Tuple[int, int], background: str) -> Image.Image:
+        """Return the sprite of an entity scaled to a cell and composited over
+        the cell's background."""
+        key = (display, cell_size, background)
+        tile = self._tiles.get(key)
+        if tile is None:
+            sprite = self._sprite_image(display, cell_size)
+            tile = Image.new('RGB', cell_size, background)
+            tile.paste(sprite, (0, 0), sprite)
+            self._tiles[key] = tile
+        return tile
+
+    def get_buffer(self) -> Image.Image:
+        """Return the composited image."""
+        return self._buffer
+
+    def get_painted(self) -> int:
+        """Return the number of cells the last render repainted."""
+        return self._painted
@@ -0,0 +1,197 @@
+from a3_support import *
+from a3_model import *
+from a3_bitboard import BitboardGrid
+import argparse
+import random
+import time
+import tracemalloc
+
+ACTIONS = (LEFT, RIGHT, COLLECT, DESTROY)
+DEFAULT_GAMES = 1000
+DEFAULT_MAX_TICKS = 500
+BACKENDS = {'dict': Grid, 'bitboard': BitboardGrid}
+
+def new_game(size: int = GRID_SIZE, grid_class: Optional[type] = None, seed: Optional[int] = None) -> Game:
+    """Create a game with the player already placed on the grid, the same way
+    the controllers set up a fresh game."""
+    game = Game(size, grid_class, seed)
+    game.get_grid().add_entity(game.get_player_position(), Player())
+    return game
+
+def apply_action(game: Game, action: str) -> None:
+    """Apply a single player action (a rotation direction or a shot type)
+    to the game model."""
+    if action in DIRECTIONS:
+        game.rotate_grid(action)
+
+    elif action in SHOT_TYPES:
+        game.fire(action)
+
+    else:
+        raise ValueError(f'Unknown action: {action!r}')
+
+class RandomPolicy:
+    """Chooses up to actions_per_tick uniformly random actions every tick."""
+    def __init__(self, actions_per_tick: int = 1, seed: Optional[int] = None) -> None:
+        self._actions_per_tick = actions_per_tick
+        self._random = random.Random(seed)
+
+    def __call__(self, game: Game) -> List[str]:
+        """Return the actions to apply before the next step of the game."""
+        count = self._random.randint(0, self._actions_per_tick)
+        return self._random.choices(ACTIONS, k=count)
+
+class ScriptedPolicy:
+    """Replays a fixed list of per-tick action lists, looping at the end."""
+    def __init__(self, script: List[List[str]]) -> None:
+        self._script = script or [[]]
+        self._index = 0
+
+    @classmethod
+    def parse(cls, text: str) -> "ScriptedPolicy":
+        """Build a policy from text such as 'A+RETURN/SPACE//D', where ticks
+        are separated by '/' and the actions within a tick by '+'."""
+        script = []
+        for tick in text.split('/'):
+            actions = [action.strip().upper() for action in tick.split('+') if action.strip()]
+            for action in actions:
+                if action not in ACTIONS:
+                    raise ValueError(f'Unknown action in script: {action!r}')
+            script.append(actions)
+        return cls(script)
+
+    def __call__(self, game: Game) -> List[str]:
+        """Return the actions to apply before the next step of the game."""
+        actions = self._script[self._index % len(self._script)]
+        self._index += 1
+        return actions
+
+def idle_policy(game: Game) -> List[str]:
+    """Never act; useful to measure the cost of Game.step() on its own."""
+    return []
+
+def play_game(game: Game, policy, max_ticks: int = DEFAULT_MAX_TICKS) -> Tuple[int, Optional[bool]]:
+    """Drive a game with the policy until it is won, lost or max_ticks steps
+    have run.
+
+    return:
+        Tuple(ticks played, True if won / False if lost / None if unfinished)
+    """
+    ticks = 0
+    while ticks < max_ticks:
+        for action in policy(game):
+            apply_action(game, action)
+            if game.has_won() is not None:
+                return ticks, game.has_won()
+
+        game.step()
+        ticks += 1
+        if game.has_won() is not None:
+            return ticks, game.has_won()
+
+    return ticks, None
+
+def run(policy_factory, games: int = DEFAULT_GAMES, size: int = GRID_SIZE,
+        max_ticks: int = DEFAULT_MAX_TICKS, grid_class: Optional[type] = None,
+        seed: Optional[int] = None) -> Dict[str, float]:
+    """Play a number of games back to back and report model throughput.
+
+    Parameters:
+        policy_factory: callable,
+        Called with the game index to build the policy used for that game.
+
+        seed: int,
+        If given, game i is seeded with seed + i so the run is reproducible.
+    """
+    ticks = wins = losses = 0
+    start = time.perf_counter()
+    for index in range(games):
+        game = new_game(size, grid_class, None if seed is None else seed + index)
+        played, outcome = play_game(game, policy_factory(index), max_ticks)
+        ticks += played
+        if outcome:
+            wins += 1
+
+        elif outcome is not None:
+            losses += 1
+
+    seconds = time.perf_counter() - start
+    return {'games': games,
+            'ticks': ticks,
+            'wins': wins,
+            'losses': losses,
+            'unfinished': games - wins - losses,
+            'seconds': seconds,
+            'ticks_per_second': ticks / seconds if seconds else float('inf'),
+            'games_per_second': games / seconds if seconds else float('inf')}
+
+def benchmark_step(sizes: List[int], per_row: int = 3, repeat: int = 1000,
+                   grid_class: Optional[type] = None) -> Dict[int, float]:
+    """Time Grid.step() on boards holding per_row entities in every row,
+    refilling the bottom row after each step like Game.step() does, and
+    return the mean microseconds per tick for each size."""
+    timings = {}
+    for size in sizes:
+        grid = (grid_class or Grid)(size)
+        spawn = [(Position(x, size - 1), Collectable()) for x in range(min(per_row, size))]
+        for _ in range(size):
+            grid.step()
+            for position, entity in spawn:
+                grid.add_entity(position, entity)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            grid.step()
+            for position, entity in spawn:
+                grid.add_entity(position, entity)
+        timings[size] = (time.perf_counter() - start)/repeat*1e6
+    return timings
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, float]:
+    """Run the headless simulation from the command line and print a report."""
+    parser = argparse.ArgumentParser(description='Run the Hacker game model without a display.')
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES)
+    parser.add_argument('--size', type=int, default=GRID_SIZE)
+    parser.add_argument('--max-ticks', type=int, default=DEFAULT_MAX_TICKS)
+    parser.add_argument('--policy', choices=('random', 'script', 'idle'), default='random')
+    parser.add_argument('--script', default='', help="per-tick actions, e.g. 'A+RETURN/SPACE//D'")
+    parser.add_argument('--actions-per-tick', type=int, default=2)
+    parser.add_argument('--backend', choices=tuple(BACKENDS), default='dict')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--bench-step', type=int, nargs='+', metavar='SIZE',
+                        help='only time Grid.step() at each of these sizes')
+    parser.add_argument('--memory', action='store_true', help='trace allocations and report the peak memory')
+    args = parser.parse_args(argv)
+
+    if args.bench_step:
+        timings = benchmark_step(args.bench_step, grid_class=BACKENDS[args.backend])
+        for size, microseconds in timings.items():
+            print(f"size {size:>5}: {microseconds:.2f} us/tick")
+        return timings
+
+    if args.policy == 'random':
+        seed = args.seed
+        policy_factory = lambda index: RandomPolicy(args.actions_per_tick, None if seed is None else seed + index)
+
+    elif args.policy == 'script':
+        policy_factory = lambda index: ScriptedPolicy.parse(args.script)
+
+    else:
+        policy_factory = lambda index: idle_policy
+
+    if args.memory:
+        tracemalloc.start()
+    report = run(policy_factory, args.games, args.size, args.max_ticks, BACKENDS[args.backend], args.seed)
+    if args.memory:
+        report['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print(f"{report['games']} games, {report['ticks']} ticks in {report['seconds']:.3f}s "
+          f"(won {report['wins']}, lost {report['losses']}, unfinished {report['unfinished']})")
+    print(f"{report['ticks_per_second']:.0f} ticks/s, {report['games_per_second']:.1f} games/s")
+    if args.memory:
+        print(f"peak traced memory {report['peak_bytes']/1024:.0f} KiB")
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+from a3_support import *
+from a3_model import *
+import a3_save
+import argparse
+import base64
+import os
+import time
+import zlib
+
+JOURNAL_MAGIC = 'hacker-journal'
+JOURNAL_VERSION = 2
+ROTATE = 'rotate'
+FIRE = 'fire'
+STEP = 'step'
+REWIND = 'rewind'
+JOURNAL_MAX_BYTES = 8*1024*1024
+
+def state_digest(game: Game) -> int:
+    """Return a checksum of the grid and counters of a game."""
+    return zlib.crc32(a3_save.encode_game(game))
+
+class Journal:
+    """Journal is an append-only log of everything that changes a game: its
+    seed, every rotation and shot, every step together with a checkpoint of
+    the counters and a digest of the grid, and every rewind to the state
+    before an earlier step. Replaying the log through a new
+    game with the same seed must reproduce every checkpoint.
+
+    Each game starts with a header line, so one file holds many games. When
+    a game starts in a file that has grown past JOURNAL_MAX_BYTES, the file
+    is first renamed to the same name with '.1' appended, replacing the
+    previous one, so the games before it are kept but the journal stays
+    bounded. A game loaded from a save file carries the save it started
+    from, compressed and base64 encoded, so saving over that file later does
+    not change what the journal replays:
+        # hacker-journal 2 <seed> <size> <task> [<starting save>]
+        <tick> rotate <direction>
+        <tick> fire <shot type>
+        <tick> step <collected> <destroyed> <total shots> <digest>
+        <tick> rewind
+    """
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        Parameters:
+            path: str,
+            The file the journal is appended to, or None to keep it in memory only
+        """
+        self._path = path
+        self._file = None
+        self._lines = []
+        self._tick = 0
+
+    def _write(self, line: str) -> None:
+        """Append one line to the journal."""
+        self._lines.append(line)
+        if self._file is not None:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def start(self, game: Game, save_path: Optional[str] = None) -> None:
+        """Begin the journal of a new game, optionally loaded from a save file."""
+        if self._path:
+            self._open()
+        self._tick = 0
+        header = f'# {JOURNAL_MAGIC} {JOURNAL_VERSION} {game.get_seed()} {game.get_grid().get_size()} {TASK}'
+        if save_path:
+            header += ' ' + base64.b64encode(zlib.compress(a3_save.encode_game(game))).decode()
+        self._write(header)
+
+    def _open(self) -> None:
+        """Open the journal file for appending, first moving it aside to the
+        '.1' file if it has grown past JOURNAL_MAX_BYTES."""
+        if os.path.exists(self._path) and os.path.getsize(self._path) > JOURNAL_MAX_BYTES:
+            self.close()
+            os.replace(self._path, self._path + '.1')
+
+        if self._file is None:
+            self._file = open(self._path, 'a')
+
+    def record_rotate(self, direction: str) -> None:
+        """Record a rotation of the grid."""
+        self._write(f'{self._tick} {ROTATE} {direction}')
+
+    def record_fire(self, shot_type: str) -> None:
+        """Record a shot."""
+        self._write(f'{self._tick} {FIRE} {shot_type}')
+
+    def record_step(self, game: Game) -> None:
+        """Record a step of the game along with a checkpoint of its state."""
+        self._tick += 1
+        self._write(f'{self._tick} {STEP} {game.get_num_collected()} {game.get_num_destroyed()} '
+                    f'{game.get_total_shots()} {state_digest(game)}')
+
+    def record_rewind(self) -> None:
+        """Record a rewind to the game as it was before its latest step that
+        has not already been rewound."""
+        self._write(f'{self._tick} {REWIND}')
+
+    def get_lines(self) -> List[str]:
+        """Return every line written to this journal."""
+        return list(self._lines)
+
+    def close(self) -> None:
+        """Close the journal file. Later lines are only kept in memory."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class JournalGame:
+    """The recorded inputs and checkpoints of a single game in a journal."""
+    def __init__(self, seed: int, size: int, task: int, start_save: Optional[bytes]) -> None:
+        self._seed = seed
+        self._size = size
+        self._task = task
+        self._start_save = start_save
+        self._events = []
+
+    def add_event(self, tick: int, kind: str, arguments: List[str]) -> None:
+        """Add the next recorded event of the game."""
+        self._events.append((tick, kind, arguments))
+
+    def get_events(self) -> List[Tuple[int, str, List[str]]]:
+        """Return the (tick, kind, arguments) of every recorded event in order."""
+        return self._events
+
+    def new_game(self, grid_class: Optional[type] = None) -> Game:
+        """Create the game as it was when the journal started."""
+        if self._task != TASK:
+            raise ValueError(f'Journal was recorded for TASK {self._task}, not {TASK}')
+
+        if self._start_save is not None:
+            return a3_save.decode_game(self._start_save, grid_class, self._seed).get_game()
+
+        game = Game(self._size, grid_class, self._seed)
+        game.get_grid().add_entity(game.get_player_position(), Player())
+        return game
+
+def read_journal(path: str) -> List[JournalGame]:
+    """Parse every game recorded in a journal file."""
+    games = []
+    with open(path) as file:
+        for number, line in enumerate(file, 1):
+            line = line.rstrip('\n')
+            if not line:
+                continue
+
+            if line.startswith('#'):
+                fields = line[1:].split(maxsplit=5)
+                if len(fields) < 5 or fields[0] != JOURNAL_MAGIC or int(fields[1]) != JOURNAL_VERSION:
+                    raise ValueError(f'{path}:{number}: not a journal header')
+                start_save = None
+                if len(fields) > 5:
+                    try:
+                        start_save = zlib.decompress(base64.b64decode(fields[5], validate=True))
+                    except (ValueError, zlib.error):
+                        raise ValueError(f'{path}:{number}: invalid starting save') from None
+                games.append(JournalGame(int(fields[2]), int(fields[3]), int(fields[4]), start_save))
+                continue
+
+            if not games:
+                raise ValueError(f'{path}:{number}: event before the first journal header')
+            tick, kind, *arguments = line.split()
+            if kind not in (ROTATE, FIRE, STEP, REWIND):
+                raise ValueError(f'{path}:{number}: unknown event {kind!r}')
+            games[-1].add_event(int(tick), kind, arguments)
+    return games
+
+def replay(journal_game: JournalGame, grid_class: Optional[type] = None,
+           verify: bool = True) -> Dict[str, object]:
+    """Re-run a recorded game as fast as possible. When verify is set, every
+    step checkpoint is compared with the replayed game and the ticks that do
+    not match are reported."""
+    game = journal_game.new_game(grid_class)
+    history = []
+    mismatches = []
+    ticks = 0
+
+    start = time.perf_counter()
+    for tick, kind, arguments in journal_game.get_events():
+        if kind == ROTATE:
+            game.rotate_grid(arguments[0])
+
+        elif kind == FIRE:
+            game.fire(arguments[0])
+
+        elif kind == REWIND:
+            game.restore(history.pop())
+
+        else:
+            history.append(game.snapshot())
+            game.step()
+            ticks += 1
+            if verify:
+                state = [game.get_num_collected(), game.get_num_destroyed(), game.get_total_shots(),
+                         state_digest(game)]
+                if state != [int(argument) for argument in arguments]:
+                    mismatches.append(tick)
+    seconds = time.perf_counter() - start
+
+    events = len(journal_game.get_events())
+    return {'game': game,
+            'events': events,
+            'ticks': ticks,
+            'seconds': seconds,
+            'events_per_second': events/seconds if seconds else float('inf'),
+            'mismatches': mismatches}
+
+def main(argv: Optional[List[str]] = None) -> bool:
+    """Replay recorded games headlessly, checking and timing them."""
+    parser = argparse.ArgumentParser(description='Replay Hacker input journals.')
+    parser.add_argument('path', nargs='?', default=JOURNAL_FILE)
+    parser.add_argument('--game', type=int, default=None, help='index of the game to replay, all by default')
+    parser.add_argument('--repeat', type=int, default=1, help='replay each game this many times')
+    parser.add_argument('--no-verify', action='store_true', help='skip checkpoints to time the engine alone')
+    args = parser.parse_args(argv)
+
+    games = read_journal(args.path)
+    if args.game is not None:
+        games = [games[args.game]]
+
+    all_matched = True
+    for index, journal_game in enumerate(games):
+        for _ in range(args.repeat):
+            result = replay(journal_game, verify=not args.no_verify)
+        matched = not result['mismatches']
+        all_matched = all_matched and matched
+        status = 'ok' if matched else f"MISMATCH at ticks {result['mismatches'][:10]}"
+        print(f"game {index}: {result['events']} events, {result['ticks']} ticks, "
+              f"{result['events_per_second']:.0f} events/s, {status}")
+    return all_matched
+
+
+if __name__ == '__main__':
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,1081 @@
+from a3_support import *
+from bisect import bisect_left, insort
+from types import MappingProxyType
+import random
+
+class Entity:
+    """Entity is an abstract class that is used to represent any element
+    that can appear on the game’s grid. Entities hold no state of their own;
+    each subclass has the TYPE_CODES code of its kind as code, which keys its
+    EntityRules in ENTITY_RULES."""
+    __slots__ = ()
+
+    def display(self):
+        """Return the character used to represent this entity in a
+        text-based grid."""
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        """Return a representation of this entity."""
+        return f'{self.__class__.__name__}()'
+
+class Player(Entity):
+    """A subclass of Entity representing a Player within the game."""
+    __slots__ = ()
+    code = TYPE_CODES[PLAYER]
+
+    def display(self) -> str:
+        """Return the character representing a player: ’P’"""
+        return PLAYER
+
+class Destroyable(Entity):
+    """A subclass of Entity representing a Destroyable within the game.
+    A destroyable can be destroyed by the player but not collected."""
+    __slots__ = ()
+    code = TYPE_CODES[DESTROYABLE]
+
+    def display(self):
+        """Return the character representing a destroyable: ’D’"""
+        return DESTROYABLE
+
+class Collectable(Entity):
+    """A subclass of Entity representing a Collectable within the game.
+    A collectable can be destroyed or collected by the player."""
+    __slots__ = ()
+    code = TYPE_CODES[COLLECTABLE]
+
+    def display(self):
+        """Return the character representing a collectable: ’C’"""
+        return COLLECTABLE
+
+class Blocker(Entity):
+    """A subclass of Entity representing a Blocker within the game.
+    A blocker cannot be destroyed or collected by the player."""
+    __slots__ = ()
+    code = TYPE_CODES[BLOCKER]
+
+    def display(self):
+        """Return the character representing a blocker: ’B’"""
+        return BLOCKER
+
+class Bomb(Entity):
+    """A subclass of Entity representing a Bomb within the game that
+    player’s can destroy other entities with.
+    A bomb removes all entities within a ‘splash damage’ radius.
+    The SPLASH constant refers to the specific offsets.
+    A bomb can be destroyed but cannot be collected."""
+    __slots__ = ()
+    code = TYPE_CODES[BOMB]
+
+    def display(self):
+        """Return the character representing a bomb: ’B’"""
+        return BOMB
+
+class EntityRules:
+    """EntityRules describes how the game treats one kind of entity, so that
+    Game and Grid decide what happens to an entity by looking its rules up
+    by type code instead of testing its class. The shared instance of the
+    kind is kept with its rules."""
+    __slots__ = ('entity', 'code', 'display', 'pinned', 'blocks_shot', 'collectable', 'destroyable',
+                 'counts_destroyed', 'counts_splashed', 'splash', 'loses_at_top')
+
+    def __init__(self, entity: Entity, pinned: bool = False, blocks_shot: bool = False,
+                 collectable: bool = False, destroyable: bool = False, counts_destroyed: bool = False,
+                 counts_splashed: bool = False, splash: Tuple[Tuple[int, int], ...] = (),
+                 loses_at_top: bool = False) -> None:
+        """
+        Parameters:
+            entity: Entity,
+            The instance shared by every entity of the kind
+
+            pinned: bool,
+            Whether it stays in place as the field moves and survives splashes, like the player
+
+            blocks_shot: bool,
+            Whether a shot reaching it does nothing at all
+
+            collectable, destroyable: bool,
+            Whether a collect or a destroy shot removes it
+
+            counts_destroyed, counts_splashed: bool,
+            Whether removing it with a destroy shot, or a splash, counts as destroying one
+
+            splash: Tuple[Tuple[int, int], ...],
+            The offsets of the cells cleared when a destroy shot removes it
+
+            loses_at_top: bool,
+            Whether the game is lost when it moves off the top of the field
+        """
+        self.entity = entity
+        self.code = entity.code
+        self.display = entity.display()
+        self.pinned = pinned
+        self.blocks_shot = blocks_shot
+        self.collectable = collectable
+        self.destroyable = destroyable
+        self.counts_destroyed = counts_destroyed
+        self.counts_splashed = counts_splashed
+        self.splash = splash
+        self.loses_at_top = loses_at_top
+
+    def __repr__(self) -> str:
+        """Return a representation of these EntityRules."""
+        return f'EntityRules({self.entity!r})'
+
+def rules_table(kinds) -> List[Optional[EntityRules]]:
+    """Return the rules of the given kinds in a list indexed by type code,
+    holding None at codes without a kind such as EMPTY_CODE."""
+    table = [None]*(max(rules.code for rules in kinds) + 1)
+    for rules in kinds:
+        table[rules.code] = rules
+    return table
+
+ENTITY_RULES = rules_table((EntityRules(Player(), pinned=True),
+                            EntityRules(Collectable(), collectable=True, destroyable=True),
+                            EntityRules(Destroyable(), destroyable=True, counts_destroyed=True,
+                                        counts_splashed=True, loses_at_top=True),
+                            EntityRules(Blocker(), blocks_shot=True),
+                            EntityRules(Bomb(), destroyable=True, counts_destroyed=True, splash=SPLASH)))
+
+# the shared instance of each kind, handed out by Game.create_entity
+SHARED_ENTITIES = {rules.display: rules.entity for rules in ENTITY_RULES if rules is not None}
+
+# the display characters of the kinds that stay in place as the field moves
+PINNED_DISPLAYS = frozenset(rules.display for rules in ENTITY_RULES if rules is not None and rules.pinned)
+
+# a grid interns at most this many rows' worth of positions
+POOL_ROWS = 4
+
+class PositionPool:
+    """The interned Positions of one grid, for its hot paths: the bottom row
+    entities spawn in, the player's column that shots search and the cells a
+    splash reaches. Each Position is made the first time it is asked for and
+    shared from then on, so those paths stop allocating once a game is under
+    way.
+
+    A pool belongs to its grid and goes with it. It holds at most POOL_ROWS
+    rows' worth of positions, which covers the hot paths; once it is full,
+    positions it does not hold are made fresh, so it never grows toward one
+    Position per cell."""
+    def __init__(self, size: int) -> None:
+        """
+        Parameters:
+            size: int,
+            The rows and cols of the grid using the pool
+        """
+        self._size = size
+        self._capacity = POOL_ROWS*size
+        self._positions = {}
+
+    def get(self, x: int, y: int) -> Position:
+        """Return the shared Position (x, y), or a new one if it is outside the
+        grid or the pool is full."""
+        if not (0 <= x < self._size and 0 <= y < self._size):
+            return Position(x, y)
+
+        key = y*self._size + x
+        position = self._positions.get(key)
+        if position is None:
+            position = Position(x, y)
+            if len(self._positions) < self._capacity:
+                self._positions[key] = position
+        return position
+
+    def __len__(self) -> int:
+        """Return the number of positions interned."""
+        return len(self._positions)
+
+HASH_SEED = 0x5EEDC0DE
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+def _is_prime(number: int) -> bool:
+    """Return whether a number below 2**64 is prime, by a deterministic
+    Miller-Rabin test."""
+    if number < 2:
+        return False
+
+    for base in MILLER_RABIN_BASES:
+        if number % base == 0:
+            return number == base
+
+    odd, twos = number - 1, 0
+    while odd % 2 == 0:
+        odd, twos = odd//2, twos + 1
+
+    for base in MILLER_RABIN_BASES:
+        value = pow(base, odd, number)
+        if value in (1, number - 1):
+            continue
+        for _ in range(twos - 1):
+            value = value*value % number
+            if value == number - 1:
+                break
+        else:
+            return False
+    return True
+
+class GridHashKeys:
+    """The keys of the Zobrist-style hash kept by grids of one size.
+
+    The key of an entity of kind k at (x, y) is V[k] * A**x * B**y modulo a
+    prime P below 2**64, where the V[k] and B are fixed pseudo-random numbers
+    and A has order size modulo P. The hash of a grid is the sum of the keys
+    of its entities modulo P. Adding or removing an entity adds or subtracts
+    one key, moving every entity up a row multiplies the hash by B**-1, and
+    rotating every row multiplies it by A or A**-1, since A**size is 1 and
+    the columns wrap around. Plain XOR keys would have to be recomputed for
+    every entity on each step and rotation.
+
+    The keys are the same in every process, so hashes can be stored and
+    compared across runs."""
+    def __init__(self, size: int) -> None:
+        """
+        Parameters:
+            size: int,
+            The rows and cols of the grids using these keys
+        """
+        self._size = size
+
+        # the largest prime below 2**64 with an element of order size
+        multiple = (2**64 - 2)//size
+        while not _is_prime(multiple*size + 1):
+            multiple -= 1
+        self._prime = prime = multiple*size + 1
+
+        factors = [factor for factor in range(2, size + 1) if size % factor == 0 and _is_prime(factor)]
+        generator = 2
+        column_key = pow(generator, (prime - 1)//size, prime)
+        while any(pow(column_key, size//factor, prime) == 1 for factor in factors):
+            generator += 1
+            column_key = pow(generator, (prime - 1)//size, prime)
+
+        rng = random.Random(HASH_SEED + size)
+        self._row_key = rng.randrange(2, prime - 1)
+        self._row_inverse = pow(self._row_key, -1, prime)
+        self._column_powers = [pow(column_key, x, prime) for x in range(size)]
+        self._row_powers = [pow(self._row_key, y, prime) for y in range(size)]
+
+        # V[k] * A**x for every kind and column, so a key takes a single product
+        self._column_values = {}
+        for display in TYPE_CODES:
+            value = rng.randrange(1, prime)
+            self._column_values[display] = [value*power % prime for power in self._column_powers]
+
+    def key(self, display: str, x: int, y: int) -> int:
+        """Return the key of an entity with the given display character at (x, y)."""
+        if 0 <= y < self._size:
+            row_power = self._row_powers[y]
+        else:
+            row_power = pow(self._row_key, y, self._prime)
+        return self._column_values[display][x % self._size]*row_power % self._prime
+
+    def add(self, value: int, display: str, x: int, y: int) -> int:
+        """Return a hash with the key of an entity at (x, y) added."""
+        return (value + self.key(display, x, y)) % self._prime
+
+    def remove(self, value: int, display: str, x: int, y: int) -> int:
+        """Return a hash with the key of an entity at (x, y) taken away."""
+        return (value - self.key(display, x, y)) % self._prime
+
+    def combine(self, value: int, other: int) -> int:
+        """Return the hash of the entities of two disjoint hashes together."""
+        return (value + other) % self._prime
+
+    def step(self, value: int) -> int:
+        """Return a hash with every entity moved up one row."""
+        return value*self._row_inverse % self._prime
+
+    def rotate(self, value: int, offset_x: int) -> int:
+        """Return a hash with every entity moved offset_x columns, wrapping around."""
+        return value*self._column_powers[offset_x % self._size] % self._prime
+
+    def hash_serialised(self, serialised: Dict[Tuple[int, int], str]) -> int:
+        """Return the hash of a serialised grid, computed from scratch."""
+        value = 0
+        for (x, y), display in serialised.items():
+            value = self.add(value, display, x, y)
+        return value
+
+_grid_hash_keys = {}
+
+class GridSnapshot:
+    """An immutable copy of the state of a grid, taken by Grid.snapshot and
+    handed back to Grid.restore. The state is private to the grid class
+    that took it and shares every unchanged part with the grid."""
+    def __init__(self, grid_class: type, size: int, state: tuple) -> None:
+        self._grid_class = grid_class
+        self._size = size
+        self._state = state
+
+    def get_grid_class(self) -> type:
+        """Return the class of the grid the snapshot was taken from."""
+        return self._grid_class
+
+    def get_size(self) -> int:
+        """Return the size of the grid the snapshot was taken from."""
+        return self._size
+
+    def get_state(self) -> tuple:
+        """Return the backend specific state of the grid."""
+        return self._state
+
+    def __repr__(self) -> str:
+        """Return a representation of this GridSnapshot."""
+        return f'GridSnapshot({self._grid_class.__name__}, {self._size})'
+
+class GridChange:
+    """The change one call made to a grid, handed to the grid's subscribers.
+
+    Cells are logical (x, y) tuples mapped to display characters, as in
+    Grid.serialise. A change is applied in order: the removed cells are
+    taken away where they were, then every entity of a kind that is not
+    pinned moves by the shift (the columns wrapping around) while pinned
+    ones such as the player stay wherever they are, then the added cells are
+    placed and the changed cells take their new display character. Steps
+    and rotations are described by their shift alone rather than by every
+    entity they move, so a change stays as small as the call that made it."""
+    def __init__(self, version: int, added: Optional[Dict[Tuple[int, int], str]] = None,
+                 removed: Optional[Dict[Tuple[int, int], str]] = None,
+                 changed: Optional[Dict[Tuple[int, int], str]] = None,
+                 shift: Tuple[int, int] = (0, 0)) -> None:
+        """
+        Parameters:
+            version: int,
+            The version of the grid after the change
+
+            added, removed, changed: Dict[Tuple[int, int], str],
+            The cells that gained an entity, lost one (with the display
+            character they lost) or hold an entity of a new type
+
+            shift: Tuple[int, int],
+            The (dx, dy) every entity below the player row moved by
+        """
+        self._version = version
+        self._added = added or {}
+        self._removed = removed or {}
+        self._changed = changed or {}
+        self._shift = shift
+
+    def get_version(self) -> int:
+        """Return the version of the grid after the change."""
+        return self._version
+
+    def get_added(self) -> Dict[Tuple[int, int], str]:
+        """Return the cells that gained an entity, with its display character."""
+        return self._added
+
+    def get_removed(self) -> Dict[Tuple[int, int], str]:
+        """Return the cells that lost an entity, with its display character."""
+        return self._removed
+
+    def get_changed(self) -> Dict[Tuple[int, int], str]:
+        """Return the cells holding an entity of a new type, with its display character."""
+        return self._changed
+
+    def get_shift(self) -> Tuple[int, int]:
+        """Return the (dx, dy) every entity below the player row moved by."""
+        return self._shift
+
+    def apply(self, cells: Dict[Tuple[int, int], str], size: int) -> Dict[Tuple[int, int], str]:
+        """Return the cells of a serialised grid of the given size with the
+        change applied. The given dictionary is not changed."""
+        cells = {cell: display for cell, display in cells.items() if cell not in self._removed}
+        dx, dy = self._shift
+        if dx or dy:
+            cells = {(x, y) if display in PINNED_DISPLAYS else ((x + dx) % size, y + dy): display
+                     for (x, y), display in cells.items()}
+        cells.update(self._added)
+        cells.update(self._changed)
+        return cells
+
+    def __repr__(self) -> str:
+        """Return a representation of this GridChange."""
+        return (f'GridChange({self._version}, added={self._added}, removed={self._removed}, '
+                f'changed={self._changed}, shift={self._shift})')
+
+def grid_hash_keys(size: int) -> GridHashKeys:
+    """Return the shared hash keys of grids of the given size."""
+    if size not in _grid_hash_keys:
+        _grid_hash_keys[size] = GridHashKeys(size)
+    return _grid_hash_keys[size]
+
+class AbstractGrid:
+    """AbstractGrid is an abstract class that is used to represent the 2D grid
+    of entities, whose top left position is indicated by (0, 0). It holds what
+    every storage backend shares and leaves the storage of the field (every
+    row below the player row) to its subclasses, Grid and BitboardGrid.
+
+    Players are pinned and never move, so they are kept in a dictionary
+    apart from the field. A subclass stores the other entities through
+    _place and _unplace, which add_entity and remove_entity call.
+
+    A grid keeps the Zobrist-style hash of its logical layout described by
+    GridHashKeys, updated with every change so get_hash takes constant time.
+
+    Every change to the grid increments its version and is described by a
+    GridChange sent to each subscriber, so views can follow the grid without
+    rescanning it. serialise builds its mapping once per version and hands
+    out a read-only view of it."""
+    def __init__(self, size: int) -> None:
+        """A grid is constructed with a size representing the number of
+        rows (equal to the number of columns) in the grid. Initially a grid
+        does not contain any entities."""
+        self._size = size
+        self._pinned = {}
+        self._position_pool = PositionPool(size)
+
+        # the hash of the field, kept apart from the pinned players which never move
+        self._hash_keys = grid_hash_keys(size)
+        self._field_hash = 0
+        self._pinned_hash = 0
+
+        self._version = 0
+        self._subscribers = []
+        self._serialised = None
+        self._serialised_version = None
+
+    def get_size(self) -> int:
+        """Return the size of the grid."""
+        return self._size
+
+    def get_position(self, x: int, y: int) -> Position:
+        """Return the Position (x, y) from the grid's pool, for the hot paths
+        that make the same positions tick after tick. Other code should make
+        its own Positions rather than fill the pool."""
+        return self._position_pool.get(x, y)
+
+    def _pin(self, position: Position, entity: Entity) -> None:
+        """Place a player, which never moves with the field."""
+        self._pinned[position] = entity
+        self._pinned_hash = self._hash_keys.add(self._pinned_hash, entity.display(),
+                                                position.get_x(), position.get_y())
+
+    def _unpin(self, position: Position) -> None:
+        """Remove the player at a position."""
+        entity = self._pinned.pop(position)
+        self._pinned_hash = self._hash_keys.remove(self._pinned_hash, entity.display(),
+                                                   position.get_x(), position.get_y())
+
+    def get_version(self) -> int:
+        """Return the number of changes made to the grid since it was created."""
+        return self._version
+
+    def subscribe(self, callback) -> None:
+        """Call callback(change) with a GridChange after every change to the grid."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        """Stop calling a subscribed callback."""
+        self._subscribers.remove(callback)
+
+    def _publish(self, **cells) -> None:
+        """Count a change to the grid and send it to the subscribers."""
+        self._version += 1
+        if self._subscribers:
+            change = GridChange(self._version, **cells)
+            for callback in list(self._subscribers):
+                callback(change)
+
+    def _publish_restore(self, before: Optional[Dict[Tuple[int, int], str]]) -> None:
+        """Count a restore and send the subscribers the cells it changed, given
+        the grid serialised before it (None if there were no subscribers)."""
+        if before is None:
+            self._publish()
+            return
+
+        after = self._serialise()
+        self._publish(added={cell: after[cell] for cell in after.keys() - before.keys()},
+                      removed={cell: before[cell] for cell in before.keys() - after.keys()},
+                      changed={cell: after[cell] for cell in after.keys() & before.keys()
+                               if after[cell] != before[cell]})
+
+    def add_entity(self, position: Position, entity: Entity) -> None:
+        """Add a given entity into the grid at a specified position.
+        This entity is only added if the position is valid.
+        If an entity already exists at the specified position, this method will
+        replace the current entity at the specified position.
+
+        Parameters:
+            position: Position,
+            the Position class in support.py
+
+            entity: Entity,
+        """
+        pinned = ENTITY_RULES[entity.code].pinned
+        if not pinned and not self.in_bounds(position):
+            return
+
+        previous = self.get_entity(position)
+        if previous is not None:
+            self._discard(position)
+
+        if pinned:
+            self._pin(position, entity)
+        else:
+            self._place(position, entity)
+
+        cell = (position.get_x(), position.get_y())
+        if previous is None:
+            self._publish(added={cell: entity.display()})
+
+        elif previous.display() != entity.display():
+            self._publish(changed={cell: entity.display()})
+
+    def _place(self, position: Position, entity: Entity) -> None:
+        """Place a non-player entity at an empty position inside the field."""
+        raise NotImplementedError
+
+    def get_entities(self) -> Dict[Position, Entity]:
+        """Return a new dictionary containing grid entities at their logical
+        positions. Updating the returned dictionary has no side-effects.
+
+        return:
+            Dict in format: {Position:Entity}
+        """
+        raise NotImplementedError
+
+    def get_entity(self, position: Position) -> Optional[Entity]:
+        """Return a entity from the grid at a specific position or None if
+        the position does not have a mapped entity."""
+        raise NotImplementedError
+
+    def remove_entity(self, position: Position) -> None:
+        """Remove an entity from the grid at a specified position."""
+        entity = self.get_entity(position)
+        if entity is not None:
+            self._discard(position)
+            self._publish(removed={(position.get_x(), position.get_y()): entity.display()})
+
+    def _discard(self, position: Position) -> None:
+        """Remove the entity known to be at a position."""
+        if position in self._pinned:
+            self._unpin(position)
+        else:
+            self._unplace(position)
+
+    def _unplace(self, position: Position) -> None:
+        """Remove the entity known to be at a position inside the field."""
+        raise NotImplementedError
+
+    def serialise(self) -> Dict[Tuple[int, int], str]:
+        """Convert dictionary of Position and Entities into a simplified,serialised
+        dictionary mapping tuples to characters, and return this serialised mapping.
+
+        The mapping is built once per version of the grid and returned as a
+        read-only view, which stays as it was when the grid changes later.
+
+        return:
+            Dict in format: {Tuple(int, int):str}
+        """
+        if self._serialised_version != self._version:
+            self._serialised = MappingProxyType(self._serialise())
+            self._serialised_version = self._version
+        return self._serialised
+
+    def _serialise(self) -> Dict[Tuple[int, int], str]:
+        """Return a new serialised mapping of the grid."""
+        raise NotImplementedError
+
+    def first_in_column(self, x: int) -> Optional[Position]:
+        """Return the position of the first entity below the player row in
+        column x, or None if the column is empty."""
+        raise NotImplementedError
+
+    def count_entities(self, display: str) -> int:
+        """Return the number of entities on the grid whose display character
+        is the given one."""
+        raise NotImplementedError
+
+    def get_lowest_destroyable(self) -> Optional[Position]:
+        """Return the position of the Destroyable closest to the player row
+        (the leftmost one if several share that row), or None if there is none."""
+        raise NotImplementedError
+
+    def step(self) -> bool:
+        """Moves all entities except the player by an offset of (0, -1).
+        Entities moved off the top of the field are removed.
+
+        return:
+            True if a Destroyable was moved off the top of the field.
+        """
+        raise NotImplementedError
+
+    def rotate_grid(self, direction: str) -> None:
+        """Rotate the positions of all entities except the player one column
+        in the given direction, wrapping around the edges of the grid."""
+        raise NotImplementedError
+
+    def in_bounds(self, position: Position) -> bool:
+        """Return a boolean based on whether the position is valid in terms of
+        the dimensions of the grid."""
+        return 0 <= position.get_x() < self.get_size() and 1 <= position.get_y() < self.get_size()
+
+    def snapshot(self) -> GridSnapshot:
+        """Return an immutable snapshot of the grid."""
+        raise NotImplementedError
+
+    def _check_snapshot(self, snapshot: GridSnapshot) -> tuple:
+        """Return the state of a snapshot, raising a ValueError if it was
+        taken from a different kind or size of grid."""
+        if snapshot.get_grid_class() is not type(self) or snapshot.get_size() != self._size:
+            raise ValueError(f'Cannot restore {snapshot!r} into {self!r}')
+        return snapshot.get_state()
+
+    def restore(self, snapshot: GridSnapshot) -> None:
+        """Return the grid to the state of a snapshot it took."""
+        raise NotImplementedError
+
+    def get_hash(self) -> int:
+        """Return the 64-bit hash of the entities at their logical positions.
+        Grids of the same size holding the same entities at the same positions
+        have the same hash, whatever steps and rotations led to them."""
+        return self._hash_keys.combine(self._field_hash, self._pinned_hash)
+
+    def __repr__(self) -> str:
+        """Return a representation of this grid."""
+        return f'{type(self).__name__}({self.get_size()})'
+
+class Grid(AbstractGrid):
+    """A grid which stores the field as a ring buffer of physical rows, each a
+    dictionary from physical column to entity. The grid keeps a row origin,
+    the physical row currently shown as y = 1, and a column offset, so that
+    the logical x of an entity is its physical column plus the offset (modulo
+    the size). Stepping only clears the top row and advances the origin, and
+    rotating only changes the offset; positions are translated whenever
+    entities are read or written.
+
+    Besides the entities, a grid keeps secondary indexes over the physical
+    cells which are updated by add_entity, remove_entity and step: the sorted
+    physical rows occupied in each column, the number of entities of each type,
+    the sorted physical columns of the Destroyables (every kind whose rules
+    lose the game at the top) in each row and the sorted physical rows
+    holding any Destroyable. Every structure is either per
+    entity or per row and column, so memory grows with the number of entities
+    and the size, never with size squared.
+
+    Snapshots share the rows with the grid. A row is copied the first time
+    it is written after a snapshot or restore, so a snapshot costs a pointer
+    per row and every later change copies only the rows it touches. The
+    secondary indexes are left out of snapshots, since a step touches almost
+    every column; restore rebuilds them from the rows instead."""
+    def __init__(self, size: int) -> None:
+        """A grid is constructed with a size representing the number of
+        rows (equal to the number of columns) in the grid.
+        Entities should be stored in a dictionary. Initially a grid does
+        not contain any entities."""
+        super().__init__(size)
+        self._rows = [{} for _ in range(size - 1)]
+        self._row_origin = 0
+        self._column_offset = 0
+
+        # secondary indexes over physical cells, players are only counted
+        self._columns = [[] for _ in range(size)]
+        self._counts = {}
+        self._row_destroyables = [[] for _ in range(size - 1)]
+        self._destroyable_rows = []
+
+        # the rows not shared with a snapshot, which may be written in place
+        self._owned_rows = set(range(size - 1))
+
+    def _cell(self, position: Position) -> Tuple[int, int]:
+        """Translate a logical position in the field to the physical
+        (column, row) where it is stored."""
+        return ((position.get_x() - self._column_offset) % self._size,
+                (position.get_y() - 1 + self._row_origin) % len(self._rows))
+
+    def _logical(self, column: int, row: int) -> Position:
+        """Translate a physical (column, row) of the field to its logical position."""
+        return Position((column + self._column_offset) % self._size,
+                        (row - self._row_origin) % len(self._rows) + 1)
+
+    def _cell_key(self, display: str, column: int, row: int) -> Tuple[str, int, int]:
+        """Return the display character and logical (x, y) of a physical cell,
+        as taken by GridHashKeys."""
+        return (display, (column + self._column_offset) % self._size,
+                (row - self._row_origin) % len(self._rows) + 1)
+
+    def _writable_row(self, row: int) -> Dict[int, Entity]:
+        """Return a physical row that may be changed, copying it first if it
+        is shared with a snapshot."""
+        if row not in self._owned_rows:
+            self._rows[row] = dict(self._rows[row])
+            self._owned_rows.add(row)
+        return self._rows[row]
+
+    def _index(self, column: int, row: int, entity: Entity) -> None:
+        """Record a newly placed entity of the field in the secondary indexes."""
+        display = entity.display()
+        self._field_hash = self._hash_keys.add(self._field_hash, *self._cell_key(display, column, row))
+        self._counts[display] = self._counts.get(display, 0) + 1
+        insort(self._columns[column], row)
+        if ENTITY_RULES[entity.code].loses_at_top:
+            columns = self._row_destroyables[row]
+            if not columns:
+                insort(self._destroyable_rows, row)
+            insort(columns, column)
+
+    def _unindex(self, column: int, row: int, entity: Entity) -> None:
+        """Forget a removed entity of the field in the secondary indexes."""
+        display = entity.display()
+        self._field_hash = self._hash_keys.remove(self._field_hash, *self._cell_key(display, column, row))
+        self._counts[display] -= 1
+        rows = self._columns[column]
+        rows.pop(bisect_left(rows, row))
+        if ENTITY_RULES[entity.code].loses_at_top:
+            columns = self._row_destroyables[row]
+            columns.pop(bisect_left(columns, column))
+            if not columns:
+                self._destroyable_rows.pop(bisect_left(self._destroyable_rows, row))
+
+    def _pin(self, position: Position, entity: Entity) -> None:
+        """Place and count a player."""
+        super()._pin(position, entity)
+        self._counts[PLAYER] = self._counts.get(PLAYER, 0) + 1
+
+    def _unpin(self, position: Position) -> None:
+        """Remove and uncount the player at a position."""
+        super()._unpin(position)
+        self._counts[PLAYER] -= 1
+
+    def _place(self, position: Position, entity: Entity) -> None:
+        """Place a non-player entity at an empty position inside the field."""
+        column, row = self._cell(position)
+        self._writable_row(row)[column] = entity
+        self._index(column, row, entity)
+
+    def get_entities(self) -> Dict[Position, Entity]:
+        """Return a new dictionary containing grid entities at their logical
+        positions. Updating the returned dictionary has no side-effects.
+
+        return:
+            Dict in format: {Position:Entity}
+        """
+        entities = dict(self._pinned)
+        for row, entities_in_row in enumerate(self._rows):
+            for column, entity in entities_in_row.items():
+                entities[self._logical(column, row)] = entity
+        return entities
+
+    def get_entity(self, position: Position) -> Optional[Entity]:
+        """Return a entity from the grid at a specific position or None if
+        the position does not have a mapped entity."""
+        if position in self._pinned:
+            return self._pinned[position]
+
+        if not self.in_bounds(position):
+            return None
+        column, row = self._cell(position)
+        return self._rows[row].get(column)
+
+    def _unplace(self, position: Position) -> None:
+        """Remove the entity known to be at a position inside the field."""
+        column, row = self._cell(position)
+        self._unindex(column, row, self._writable_row(row).pop(column))
+
+    def _serialise(self) -> Dict[Tuple[int, int], str]:
+        """Return a new serialised mapping of the grid."""
+        serialised = {(position.get_x(), position.get_y()): entity.display()
+                      for position, entity in self._pinned.items()}
+        field_rows = len(self._rows)
+        for row, entities_in_row in enumerate(self._rows):
+            y = (row - self._row_origin) % field_rows + 1
+            for column, entity in entities_in_row.items():
+                serialised[((column + self._column_offset) % self._size, y)] = entity.display()
+        return serialised
+
+    def first_in_column(self, x: int) -> Optional[Position]:
+        """Return the position of the first entity below the player row in
+        column x, or None if the column is empty."""
+        rows = self._columns[(x - self._column_offset) % self._size]
+        if not rows:
+            return None
+
+        # rows are sorted physically, so the first one at or after the origin is the topmost
+        index = bisect_left(rows, self._row_origin)
+        row = rows[index] if index < len(rows) else rows[0]
+        return self._position_pool.get(x, (row - self._row_origin) % len(self._rows) + 1)
+
+    def count_entities(self, display: str) -> int:
+        """Return the number of entities on the grid whose display character
+        is the given one."""
+        return self._counts.get(display, 0)
+
+    def get_lowest_destroyable(self) -> Optional[Position]:
+        """Return the position of the Destroyable closest to the player row
+        (the leftmost one if several share that row), or None if there is none."""
+        rows = self._destroyable_rows
+        if not rows:
+            return None
+
+        # both indexes are sorted physically, so search each from the physical origin
+        index = bisect_left(rows, self._row_origin)
+        row = rows[index] if index < len(rows) else rows[0]
+
+        columns = self._row_destroyables[row]
+        index = bisect_left(columns, -self._column_offset % self._size)
+        column = columns[index] if index < len(columns) else columns[0]
+        return self._logical(column, row)
+
+    def step(self) -> bool:
+        """Moves all entities except the player by an offset of (0, -1).
+        Entities moved off the top of the field are removed.
+
+        Only the top row is cleared and the row origin advanced, which turns
+        the cleared row into the empty bottom row of the field.
+
+        return:
+            True if a Destroyable was moved off the top of the field.
+        """
+        top = self._row_origin
+        destroyable_escaped = False
+        removed = {}
+        for column, entity in self._rows[top].items():
+            self._unindex(column, top, entity)
+            removed[((column + self._column_offset) % self._size, 1)] = entity.display()
+            if ENTITY_RULES[entity.code].loses_at_top:
+                destroyable_escaped = True
+
+        self._rows[top] = {}
+        self._row_destroyables[top] = []
+        self._owned_rows.add(top)
+        self._row_origin = (top + 1) % len(self._rows)
+        self._field_hash = self._hash_keys.step(self._field_hash)
+        self._publish(removed=removed, shift=(0, -1))
+        return destroyable_escaped
+
+    def rotate_grid(self, direction: str) -> None:
+        """Rotate the positions of all entities except the player one column
+        in the given direction, wrapping around the edges of the grid.
+        Only the column offset changes, so this takes constant time."""
+        offset_x = ROTATIONS[DIRECTIONS.index(direction)][0]
+        self._column_offset = (self._column_offset + offset_x) % self._size
+        self._field_hash = self._hash_keys.rotate(self._field_hash, offset_x)
+        self._publish(shift=(offset_x, 0))
+
+    def snapshot(self) -> GridSnapshot:
+        """Return an immutable snapshot of the grid. The rows are shared until
+        the grid next changes them, and the secondary indexes are not kept."""
+        self._owned_rows.clear()
+        state = (tuple(self._rows), dict(self._counts), dict(self._pinned), self._row_origin,
+                 self._column_offset, self._field_hash, self._pinned_hash)
+        return GridSnapshot(type(self), self._size, state)
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuild the column and Destroyable indexes from the rows."""
+        self._columns = [[] for _ in range(self._size)]
+        self._row_destroyables = [[] for _ in range(len(self._rows))]
+        for row, entities_in_row in enumerate(self._rows):
+            for column in sorted(entities_in_row):
+                self._columns[column].append(row)
+                if ENTITY_RULES[entities_in_row[column].code].loses_at_top:
+                    self._row_destroyables[row].append(column)
+        self._destroyable_rows = [row for row, columns in enumerate(self._row_destroyables) if columns]
+
+    def restore(self, snapshot: GridSnapshot) -> None:
+        """Return the grid to the state of a snapshot it took. The rows stay
+        shared with the snapshot until they are changed, and the secondary
+        indexes are rebuilt from them, which takes time in the number of
+        entities."""
+        state = self._check_snapshot(snapshot)
+        before = self.serialise() if self._subscribers else None
+        rows, counts, pinned, self._row_origin, self._column_offset, self._field_hash, self._pinned_hash = state
+        self._rows = list(rows)
+        self._counts = dict(counts)
+        self._pinned = dict(pinned)
+        self._owned_rows.clear()
+        self._rebuild_indexes()
+        self._publish_restore(before)
+
+class GameSnapshot:
+    """An immutable copy of the grid and counters of a game, taken by
+    Game.snapshot and handed back to Game.restore."""
+    def __init__(self, grid: GridSnapshot, num_collected: int, num_destroyed: int, total_shots: int,
+                 won_or_lose: Optional[bool]) -> None:
+        self._grid = grid
+        self._counters = (num_collected, num_destroyed, total_shots, won_or_lose)
+
+    def get_grid(self) -> GridSnapshot:
+        """Return the snapshot of the game's grid."""
+        return self._grid
+
+    def get_counters(self) -> Tuple[int, int, int, Optional[bool]]:
+        """Return the collected, destroyed and total shots counts and the
+        outcome of the game."""
+        return self._counters
+
+class Game:
+    """The Game handles the logic for controlling the actions of the entities within the grid."""
+    def __init__(self, size: int, grid_class: Optional[type] = None, seed: Optional[int] = None) -> None:
+        """A game is constructed with a size representing the dimensions of the playing grid.
+        A game should be constructed with at least the following variable:
+
+        Parameters:
+            size: int,
+            The rows and cols of the grid
+
+            grid_class: type,
+            The Grid implementation to store entities in, Grid by default
+
+            seed: int,
+            Seed of the game's own random generator used to spawn entities,
+            a random seed is chosen if it is not given
+        """
+        self._size = size
+        self._grid = (grid_class or Grid)(size)
+        self._seed = random.randrange(2**32) if seed is None else seed
+        self._random = random.Random(self._seed)
+        self._player_position = self._grid.get_position(size//2, 0)
+        self._num_collected = 0
+        self._num_destroyed = 0
+        self._total_shots = 0
+        self._won_or_lose = None
+
+    def get_grid(self) -> AbstractGrid:
+        """Return the instance of the grid held by the game."""
+        return self._grid
+
+    def get_player_position(self) -> Position:
+        """Return the position of the player in the grid (top row, centre column).
+        This position should be constant."""
+        return self._player_position
+
+    def get_num_collected(self) -> int:
+        """Return the total of Collectables acquired."""
+        return self._num_collected
+
+    def get_num_destroyed(self) -> int:
+        """Return the total of Destroyables removed with a shot."""
+        return self._num_destroyed
+
+    def get_total_shots(self) -> int:
+        """Return the total of shots taken."""
+        return self._total_shots
+
+    def get_seed(self) -> int:
+        """Return the seed of the random generator spawning entities, so that
+        the same inputs replay the same game."""
+        return self._seed
+
+    def snapshot(self) -> 'GameSnapshot':
+        """Return an immutable snapshot of the grid and counters of the game,
+        sharing every unchanged row of the grid. The random generator is not
+        part of the snapshot, so entities spawned after a restore are new ones."""
+        return GameSnapshot(self._grid.snapshot(), self._num_collected, self._num_destroyed,
+                            self._total_shots, self._won_or_lose)
+
+    def restore(self, snapshot: 'GameSnapshot') -> None:
+        """Return the game to the state of a snapshot it took."""
+        self._grid.restore(snapshot.get_grid())
+        (self._num_collected, self._num_destroyed, self._total_shots,
+         self._won_or_lose) = snapshot.get_counters()
+
+    def rotate_grid(self, direction: str) -> None:
+        """Rotate the positions of the entities within the grid depending on
+        the direction they are being rotated."""
+        self.get_grid().rotate_grid(direction)
+
+    def create_entity(self, display: str) -> Entity:
+        """Uses a display character to create an Entity. Raises a NotImplementedError
+        if the character parsed into as the display is not an existing Entity.
+        Entities hold no state, so every entity of a kind is the shared instance
+        kept with its EntityRules."""
+        entity = SHARED_ENTITIES.get(display)
+        if entity is None:
+            raise NotImplementedError
+        return entity
+
+    def generate_entities(self) -> None:
+        """
+        Method given to the students to generate a random amount of entities to
+        add into the game after each step, drawn from the game's own seeded
+        random generator
+        """
+        # Generate amount
+        entity_count = self._random.randint(0, self.get_grid().get_size() - 3)
+        entities = self._random.choices(ENTITY_TYPES, k=entity_count)
+
+        # Blocker in a 1 in 4 chance
+        blocker = self._random.randint(1, 4) % 4 == 0
+
+        # UNCOMMENT THIS FOR TASK 3 (CSSE7030)
+        if TASK == 3:
+            bomb = False
+            if not blocker:
+                bomb = self._random.randint(1, 4) % 4 == 0
+
+        total_count = entity_count
+        if blocker:
+            total_count += 1
+            entities.append(BLOCKER)
+
+        # UNCOMMENT THIS FOR TASK 3 (CSSE7030)
+        if TASK == 3:
+            if bomb:
+                total_count += 1
+                entities.append(BOMB)
+
+        entity_index = self._random.sample(range(self.get_grid().get_size()),
+                                     total_count)
+
+        # Add entities into grid
+        for pos, entity in zip(entity_index, entities):
+            position = self.get_grid().get_position(pos, self.get_grid().get_size() - 1)
+            new_entity = self.create_entity(entity)
+            self.get_grid().add_entity(position, new_entity)
+
+    def step(self) -> None:
+        """Moves all entities on the board by an offset of (0, -1)."""
+        if self.get_grid().step():
+            self._won_or_lose = False
+
+        self.generate_entities()
+
+    def fire(self, shot_type: str) -> None:
+        """Handles the firing/collecting actions of a player towards an entity
+        within the grid.
+
+        Parameter:
+            shot_type: str,
+            shot_type refers to whether a collect or destroy shot has been fired
+            (refer to Entity descriptions for how different entities react to
+            being hit by different types).
+        """
+        self._total_shots += 1
+        grid = self.get_grid()
+        target_position = grid.first_in_column(self.get_player_position().get_x())
+        if target_position is None:
+            return
+
+        rules = ENTITY_RULES[grid.get_entity(target_position).code]
+        if rules.blocks_shot:
+            return
+
+        if shot_type == COLLECT:
+            if rules.collectable:
+                grid.remove_entity(target_position)
+                self._num_collected += 1
+                if self.get_num_collected() >= COLLECTION_TARGET:
+                    self._won_or_lose = True
+
+        elif shot_type == DESTROY and rules.destroyable:
+            grid.remove_entity(target_position)
+            if rules.counts_destroyed:
+                self._num_destroyed += 1
+
+            for x, y in rules.splash:
+                splashed_position = grid.get_position(target_position.get_x() + x, target_position.get_y() + y)
+                splashed_entity = grid.get_entity(splashed_position)
+                if splashed_entity is None or ENTITY_RULES[splashed_entity.code].pinned:
+                    continue
+
+                if ENTITY_RULES[splashed_entity.code].counts_splashed:
+                    self._num_destroyed += 1
+                grid.remove_entity(splashed_position)
+
+    def has_won(self) -> bool:
+        """Return True if the player has won the game."""
+        return self._won_or_lose
+
+    def has_lost(self) -> bool:
+        """Returns True if the game is lost (a Destroyable has reached the top row)."""
+        return self._won_or_lose
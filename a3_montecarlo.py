@@ -0,0 +1,161 @@
+from a3_support import *
+from a3_headless import BACKENDS, RandomPolicy, ScriptedPolicy, idle_policy, new_game, play_game
+import argparse
+import importlib
+import multiprocessing
+import os
+import random
+import time
+
+DEFAULT_CHUNK_SIZE = 250
+LOSS_CAUSES = ('destroyable_escaped',)
+
+def make_policy(spec: str, seed: Optional[int]):
+    """Build a policy from its command-line spec:
+        'random'            RandomPolicy with up to two actions a tick
+        'idle'              never act
+        'script:<actions>'  ScriptedPolicy, e.g. 'script:A+RETURN/SPACE'
+        '<module>:<name>'   module.name(seed) for any other importable policy
+    """
+    if spec == 'random':
+        return RandomPolicy(2, seed)
+
+    if spec == 'idle':
+        return idle_policy
+
+    prefix, _, rest = spec.partition(':')
+    if prefix == 'script':
+        return ScriptedPolicy.parse(rest)
+
+    if rest:
+        return getattr(importlib.import_module(prefix), rest)(seed)
+    raise ValueError(f'Unknown policy: {spec!r}')
+
+def empty_stats() -> Dict[str, int]:
+    """Return the totals of zero games."""
+    stats = {'games': 0, 'wins': 0, 'losses': 0, 'unfinished': 0, 'ticks': 0, 'win_ticks': 0,
+             'shots': 0, 'collected': 0, 'destroyed': 0}
+    stats.update(dict.fromkeys(LOSS_CAUSES, 0))
+    return stats
+
+def play_chunk(task: Tuple[str, int, int, str, int, int, int]) -> Dict[str, int]:
+    """Play a contiguous chunk of seeded games and return their totals.
+    Game i of the run uses seed + i for both the game and its policy, so any
+    chunking of the run gives the same results."""
+    policy_spec, size, max_ticks, backend, seed, start, count = task
+    stats = empty_stats()
+    for index in range(start, start + count):
+        game = new_game(size, BACKENDS[backend], seed + index)
+        ticks, outcome = play_game(game, make_policy(policy_spec, seed + index), max_ticks)
+
+        stats['games'] += 1
+        stats['ticks'] += ticks
+        stats['shots'] += game.get_total_shots()
+        stats['collected'] += game.get_num_collected()
+        stats['destroyed'] += game.get_num_destroyed()
+        if outcome:
+            stats['wins'] += 1
+            stats['win_ticks'] += ticks
+
+        elif outcome is None:
+            stats['unfinished'] += 1
+
+        else:
+            stats['losses'] += 1
+            stats['destroyable_escaped'] += 1
+    return stats
+
+def summarise(stats: Dict[str, int], seconds: float) -> Dict[str, float]:
+    """Turn run totals into win rate, mean ticks to win, shot efficiency,
+    loss causes, the share of games still going at max_ticks and throughput."""
+    games = stats['games']
+    summary = {'games': games,
+               'win_rate': stats['wins']/games if games else 0.0,
+               'unfinished_rate': stats['unfinished']/games if games else 0.0,
+               'mean_ticks_to_win': stats['win_ticks']/stats['wins'] if stats['wins'] else float('nan'),
+               'shot_efficiency': (stats['collected'] + stats['destroyed'])/stats['shots'] if stats['shots'] else 0.0,
+               'mean_shots': stats['shots']/games if games else 0.0,
+               'seconds': seconds,
+               'games_per_second': games/seconds if seconds else float('inf'),
+               'ticks_per_second': stats['ticks']/seconds if seconds else float('inf')}
+    for cause in LOSS_CAUSES:
+        summary[cause] = stats[cause]/games if games else 0.0
+    return summary
+
+def run(policy_spec: str, games: int, size: int = GRID_SIZE, max_ticks: int = 500,
+        backend: str = 'dict', seed: int = 0, workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE, progress=None) -> Dict[str, float]:
+    """Play games seeded seed .. seed + games - 1 across a pool of worker
+    processes. Chunks of games are handed out and their totals streamed back
+    as each chunk finishes; progress, if given, is called with the running
+    totals after every chunk."""
+    workers = workers or os.cpu_count() or 1
+    tasks = [(policy_spec, size, max_ticks, backend, seed, start, min(chunk_size, games - start))
+             for start in range(0, games, chunk_size)]
+    totals = empty_stats()
+
+    start_time = time.perf_counter()
+    if workers == 1:
+        results = map(play_chunk, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(play_chunk, tasks)
+
+    try:
+        for stats in results:
+            for key, value in stats.items():
+                totals[key] += value
+            if progress is not None:
+                progress(totals)
+    except BaseException:
+        # an error or Ctrl-C drops the queued chunks instead of waiting for them
+        if pool is not None:
+            pool.terminate()
+        raise
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    summary = summarise(totals, time.perf_counter() - start_time)
+    summary['workers'] = workers
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, float]:
+    """Estimate a policy's win rate from the command line."""
+    parser = argparse.ArgumentParser(description='Estimate policy win rates over many seeded games.')
+    parser.add_argument('--policy', default='random', help="random, idle, script:<actions> or module:factory")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--size', type=int, default=GRID_SIZE)
+    parser.add_argument('--max-ticks', type=int, default=500)
+    parser.add_argument('--backend', choices=tuple(BACKENDS), default='dict')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, all cores by default')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--quiet', action='store_true', help='do not print progress')
+    args = parser.parse_args(argv)
+
+    seed = random.randrange(2**31) if args.seed is None else args.seed
+    make_policy(args.policy, seed)  # fail on a bad policy spec before starting any workers
+
+    def progress(totals: Dict[str, int]) -> None:
+        print(f"\r{totals['games']}/{args.games} games, {totals['wins']} won", end='', flush=True)
+
+    summary = run(args.policy, args.games, args.size, args.max_ticks, args.backend, seed,
+                  args.workers, args.chunk_size, None if args.quiet else progress)
+    if not args.quiet:
+        print()
+
+    print(f"policy {args.policy}, seed {seed}, {summary['games']} games on {summary['workers']} workers")
+    print(f"win rate {summary['win_rate']:.2%}, mean ticks to win {summary['mean_ticks_to_win']:.1f}, "
+          f"shot efficiency {summary['shot_efficiency']:.2%} over {summary['mean_shots']:.1f} shots/game")
+    print('losses: ' + ', '.join(f"{cause} {summary[cause]:.2%}" for cause in LOSS_CAUSES)
+          + f", unfinished after {args.max_ticks} ticks {summary['unfinished_rate']:.2%}")
+    print(f"{summary['games_per_second']:.1f} games/s, {summary['ticks_per_second']:.0f} ticks/s "
+          f"in {summary['seconds']:.2f}s")
+    return summary
+
+
+if __name__ == '__main__':
+    main()
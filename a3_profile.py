@@ -0,0 +1,200 @@
+from a3_support import *
+import argparse
+import json
+import math
+import os
+import time
+
+HISTOGRAM_MIN_SECONDS = 1e-6
+HISTOGRAM_OCTAVES = 24
+HISTOGRAM_STEPS = 8
+
+class PhaseHistogram:
+    """PhaseHistogram counts durations in a fixed number of log-spaced buckets:
+    HISTOGRAM_STEPS per doubling from HISTOGRAM_MIN_SECONDS over
+    HISTOGRAM_OCTAVES doublings (about 17 seconds), plus one bucket for anything
+    shorter and one for anything longer. Recording is constant time and the
+    memory never grows, and a percentile is exact to within one bucket
+    (about 9%)."""
+    def __init__(self) -> None:
+        self._buckets = [0]*(HISTOGRAM_OCTAVES*HISTOGRAM_STEPS + 2)
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Count one duration."""
+        self._count += 1
+        self._total += seconds
+        if seconds > self._max:
+            self._max = seconds
+
+        if seconds < HISTOGRAM_MIN_SECONDS:
+            self._buckets[0] += 1
+            return
+
+        index = int(math.log2(seconds/HISTOGRAM_MIN_SECONDS)*HISTOGRAM_STEPS) + 1
+        self._buckets[min(index, len(self._buckets) - 1)] += 1
+
+    def bucket_limit(self, index: int) -> float:
+        """Return the upper bound in seconds of a bucket."""
+        if index >= len(self._buckets) - 1:
+            return math.inf
+        return HISTOGRAM_MIN_SECONDS*2**(index/HISTOGRAM_STEPS)
+
+    def percentile(self, fraction: float) -> float:
+        """Return the upper bound of the bucket holding the given fraction
+        (0 to 1) of the recorded durations, capped at the longest one, or 0.0
+        if nothing was recorded."""
+        if not self._count:
+            return 0.0
+
+        rank = max(1, math.ceil(fraction*self._count))
+        seen = 0
+        for index, count in enumerate(self._buckets):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_limit(index), self._max)
+        return self._max
+
+    def get_count(self) -> int:
+        """Return the number of durations recorded."""
+        return self._count
+
+    def to_dict(self) -> Dict[str, object]:
+        """Return the summary statistics and the non-empty buckets, keyed by
+        their upper bound in seconds."""
+        return {'count': self._count,
+                'mean': self._total/self._count if self._count else 0.0,
+                'p50': self.percentile(0.5),
+                'p90': self.percentile(0.9),
+                'p99': self.percentile(0.99),
+                'max': self._max,
+                'buckets': {repr(self.bucket_limit(index)): count
+                            for index, count in enumerate(self._buckets) if count}}
+
+class _PhaseTimer:
+    """Context manager timing one phase into its histogram."""
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram: PhaseHistogram) -> None:
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.record(time.perf_counter() - self._start)
+
+class _NullTimer:
+    """Context manager used for every phase while profiling is off."""
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+_NULL_TIMER = _NullTimer()
+
+class TickProfiler:
+    """TickProfiler records the wall time of each phase of a tick (such as
+    'model', 'canvas' and 'score') into a PhaseHistogram per phase:
+
+        with profiler.phase('model'):
+            game.step()
+
+    While it is disabled a phase costs one attribute check and records
+    nothing. The timers are reused, so phases of the same name must not
+    nest or run on two threads at once; different phases may be timed on
+    different threads."""
+    def __init__(self, enabled: bool = False) -> None:
+        """
+        Parameters:
+            enabled: bool,
+            Whether phases are recorded from the start
+        """
+        self._enabled = enabled
+        self._histograms = {}
+        self._timers = {}
+
+    @classmethod
+    def from_environment(cls) -> 'TickProfiler':
+        """Return a profiler enabled if the PROFILE_ENV variable is set to
+        anything other than '' or '0'."""
+        return cls(os.environ.get(PROFILE_ENV, '') not in ('', '0'))
+
+    def phase(self, name: str):
+        """Return the context manager timing the named phase."""
+        if not self._enabled:
+            return _NULL_TIMER
+
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _PhaseTimer(self._histogram(name))
+        return timer
+
+    def record(self, name: str, seconds: float) -> None:
+        """Record a duration measured elsewhere, such as the latency from an
+        input to the frame showing it."""
+        if self._enabled:
+            self._histogram(name).record(seconds)
+
+    def _histogram(self, name: str) -> PhaseHistogram:
+        """Return the histogram of a phase, creating it the first time."""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = PhaseHistogram()
+        return histogram
+
+    def toggle(self) -> bool:
+        """Turn recording on or off, keeping what was recorded, and return
+        whether it is now on."""
+        self._enabled = not self._enabled
+        return self._enabled
+
+    def is_enabled(self) -> bool:
+        """Return whether phases are being recorded."""
+        return self._enabled
+
+    def get_histograms(self) -> Dict[str, PhaseHistogram]:
+        """Return the histogram of every phase recorded so far."""
+        return dict(self._histograms)
+
+    def summary(self) -> str:
+        """Return a one-line p50/p99 summary of every phase in milliseconds."""
+        return '  '.join(f'{name} {histogram.percentile(0.5)*1e3:.2f}/{histogram.percentile(0.99)*1e3:.2f}'
+                         for name, histogram in list(self._histograms.items())) + '  ms p50/p99'
+
+    def to_dict(self) -> Dict[str, object]:
+        """Return every histogram in a JSON-friendly form."""
+        return {'phases': {name: histogram.to_dict() for name, histogram in list(self._histograms.items())}}
+
+    def dump(self, path: str) -> bool:
+        """Write every histogram to a JSON file, unless nothing has been
+        recorded. Return whether the file was written."""
+        if not self._histograms:
+            return False
+
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=1)
+        return True
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print the percentiles of a profile dumped by the game."""
+    parser = argparse.ArgumentParser(description='Summarise a Hacker tick profile.')
+    parser.add_argument('path', nargs='?', default=PROFILE_FILE)
+    args = parser.parse_args(argv)
+
+    with open(args.path) as file:
+        phases = json.load(file)['phases']
+    for name, stats in phases.items():
+        print(f"{name:>8}: {stats['count']:>7} calls, mean {stats['mean']*1e3:.3f} ms, "
+              f"p50 {stats['p50']*1e3:.3f} ms, p90 {stats['p90']*1e3:.3f} ms, "
+              f"p99 {stats['p99']*1e3:.3f} ms, max {stats['max']*1e3:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
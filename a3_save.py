@@ -0,0 +1,220 @@
+from a3_support import *
+from a3_model import *
+import argparse
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+
+SAVE_MAGIC = b'HACK'
+SAVE_VERSION = 1
+
+# magic, version, grid size, timer minutes, timer seconds, total shots, collected, destroyed
+SAVE_HEADER = struct.Struct('<4sHHIIIII')
+# a game needs three rows to spawn entities; the largest boards played are about 1000x1000
+MIN_SAVE_SIZE = 3
+MAX_SAVE_SIZE = 1024
+CODE_DISPLAYS = {code: display for display, code in TYPE_CODES.items()}
+EMPTY_DISPLAY = '.'
+ENTITY_CLASSES_BY_NAME = {type(rules.entity).__name__: type(rules.entity)
+                          for rules in ENTITY_RULES if rules is not None}
+
+LEGACY_FIELD = re.compile(r'^(\w+)@(.*)$')
+LEGACY_ENTITY = re.compile(r'Position\((-?\d+), (-?\d+)\): (\w+)\(\)')
+
+class SaveData:
+    """The contents of a save file: the game and the timer shown alongside it."""
+    def __init__(self, game: Game, minutes: int, seconds: int) -> None:
+        self._game = game
+        self._minutes = minutes
+        self._seconds = seconds
+
+    def get_game(self) -> Game:
+        """Return the saved game."""
+        return self._game
+
+    def get_timer(self) -> Tuple[int, int]:
+        """Return the saved timer as (minutes, seconds)."""
+        return self._minutes, self._seconds
+
+def encode_game(game: Game, minutes: int = 0, seconds: int = 0) -> bytes:
+    """Pack a game into the binary save format: a fixed SAVE_HEADER followed by
+    size*size bytes holding the TYPE_CODES of every cell in row-major order."""
+    size = game.get_grid().get_size()
+    cells = bytearray(size*size)
+    for (x, y), display in game.get_grid().serialise().items():
+        if 0 <= x < size and 0 <= y < size:
+            cells[y*size + x] = TYPE_CODES[display]
+
+    header = SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, size, minutes, seconds,
+                              game.get_total_shots(), game.get_num_collected(), game.get_num_destroyed())
+    return header + bytes(cells)
+
+def decode_game(data, grid_class: Optional[type] = None, seed: Optional[int] = None) -> SaveData:
+    """Rebuild a game from bytes (or any buffer, such as a memory map) in the
+    binary save format. Raises ValueError if the data is not a valid save."""
+    if len(data) < SAVE_HEADER.size:
+        raise ValueError('Save data is too short to hold a header')
+
+    magic, version, size, minutes, seconds, shots, collected, destroyed = SAVE_HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC:
+        raise ValueError('Save data does not start with the save magic')
+    if version != SAVE_VERSION:
+        raise ValueError(f'Unsupported save version: {version}')
+    if not MIN_SAVE_SIZE <= size <= MAX_SAVE_SIZE:
+        raise ValueError(f'Unsupported grid size in save data: {size}')
+    if len(data) < SAVE_HEADER.size + size*size:
+        raise ValueError('Save data is truncated')
+
+    game = Game(size, grid_class, seed)
+    grid = game.get_grid()
+    cells = data[SAVE_HEADER.size:SAVE_HEADER.size + size*size]
+    for index, code in enumerate(cells):
+        if code != EMPTY_CODE:
+            if code not in CODE_DISPLAYS:
+                raise ValueError(f'Unknown entity code in save data: {code}')
+            y, x = divmod(index, size)
+            grid.add_entity(Position(x, y), game.create_entity(CODE_DISPLAYS[code]))
+
+    game._total_shots = shots
+    game._num_collected = collected
+    game._num_destroyed = destroyed
+    return SaveData(game, minutes, seconds)
+
+def save_game(path: str, game: Game, minutes: int = 0, seconds: int = 0) -> None:
+    """Write a game and its timer to a binary save file."""
+    with open(path, 'wb') as file:
+        file.write(encode_game(game, minutes, seconds))
+
+def load_game(path: str, grid_class: Optional[type] = None, seed: Optional[int] = None) -> SaveData:
+    """Load a save file by memory-mapping it. Files written in the older
+    text format are still read, without evaluating any of their contents.
+    The loaded game spawns entities from the given seed, or a random one."""
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise ValueError('Save file is empty')
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(SAVE_MAGIC)] != SAVE_MAGIC:
+                return decode_legacy(data[:].decode(), grid_class, seed)
+            return decode_game(data, grid_class, seed)
+
+def decode_legacy(text: str, grid_class: Optional[type] = None, seed: Optional[int] = None) -> SaveData:
+    """Rebuild a game from the older 'key@value' text save format. Entities
+    are parsed from their reprs rather than evaluated."""
+    fields = {}
+    for line in text.splitlines():
+        match = LEGACY_FIELD.match(line.strip())
+        if match:
+            fields[match.group(1)] = match.group(2)
+
+    game = Game(GRID_SIZE, grid_class, seed)
+    for x, y, name in LEGACY_ENTITY.findall(fields.get('entities', '')):
+        entity_class = ENTITY_CLASSES_BY_NAME.get(name)
+        if entity_class is None:
+            raise ValueError(f'Unknown entity in save data: {name}')
+
+        position = Position(int(x), int(y))
+        if not (0 <= position.get_x() < GRID_SIZE and 0 <= position.get_y() < GRID_SIZE):
+            raise ValueError(f'Entity outside the grid in save data: {position}')
+        game.get_grid().add_entity(position, entity_class())
+
+    game._total_shots = legacy_counter(fields, 'total_shots')
+    game._num_collected = legacy_counter(fields, 'collected')
+    game._num_destroyed = legacy_counter(fields, 'destroyed')
+    return SaveData(game, legacy_counter(fields, 'time_m'), legacy_counter(fields, 'time_s'))
+
+def legacy_counter(fields: Dict[str, str], name: str) -> int:
+    """Return a counter of the older text format, 0 if it is missing. Raises
+    ValueError if it is not a whole number of at least 0."""
+    value = fields.get(name, '0').strip()
+    if not value.isdigit():
+        raise ValueError(f'Invalid {name} in save data: {value!r}')
+    return int(value)
+
+def export_text(save: SaveData) -> str:
+    """Return a human readable dump of a save, for debugging."""
+    game = save.get_game()
+    size = game.get_grid().get_size()
+    minutes, seconds = save.get_timer()
+    serialised = game.get_grid().serialise()
+    lines = [f'{TITLE} save v{SAVE_VERSION} size={size}',
+             f'timer={minutes}m {seconds}s shots={game.get_total_shots()} '
+             f'collected={game.get_num_collected()} destroyed={game.get_num_destroyed()}']
+    for y in range(size):
+        lines.append(''.join(serialised.get((x, y), EMPTY_DISPLAY) for x in range(size)))
+    return '\n'.join(lines)
+
+def save_legacy(path: str, game: Game, minutes: int = 0, seconds: int = 0) -> None:
+    """Write a game in the older text format, kept to benchmark against."""
+    with open(path, 'w') as file:
+        file.write(f'time_m@{minutes}')
+        file.write(f'\ntime_s@{seconds}')
+        file.write(f'\ntotal_shots@{game.get_total_shots()}')
+        file.write(f'\ncollected@{game.get_num_collected()}')
+        file.write(f'\ndestroyed@{game.get_num_destroyed()}')
+        file.write(f'\nentities@{game.get_grid().get_entities()}')
+
+def load_legacy_eval(path: str) -> Game:
+    """Load the older text format the way it used to be loaded, with eval,
+    kept only to benchmark against."""
+    fields = {}
+    with open(path) as file:
+        for line in file:
+            key, value = line.split('@')
+            fields[key] = value.strip()
+
+    game = Game(GRID_SIZE)
+    for position, entity in eval(fields['entities']).items():
+        game.get_grid().add_entity(position, entity)
+    return game
+
+def benchmark(game: Game, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time saving and loading a game in the binary and the older text format,
+    returning the mean milliseconds of each and the file sizes in bytes."""
+    formats = {'binary': (save_game, load_game), 'text+eval': (save_legacy, load_legacy_eval)}
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (save, load) in formats.items():
+            path = os.path.join(directory, 'game.save')
+            start = time.perf_counter()
+            for _ in range(repeat):
+                save(path, game)
+            saved = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                load(path)
+            loaded = time.perf_counter() - start
+
+            results[name] = {'save_ms': saved/repeat*1e3,
+                             'load_ms': loaded/repeat*1e3,
+                             'bytes': os.path.getsize(path)}
+    return results
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print a save file as text, or benchmark the save formats."""
+    parser = argparse.ArgumentParser(description='Inspect Hacker save files.')
+    parser.add_argument('path', nargs='?', help='save file to print as text')
+    parser.add_argument('--bench', action='store_true', help='benchmark the binary format against the text format')
+    parser.add_argument('--repeat', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.path:
+        print(export_text(load_game(args.path)))
+
+    if args.bench:
+        game = Game(GRID_SIZE)
+        game.get_grid().add_entity(game.get_player_position(), Player())
+        for _ in range(GRID_SIZE):
+            game.step()
+
+        for name, result in benchmark(game, args.repeat).items():
+            print(f"{name:>10}: save {result['save_ms']:.3f} ms, load {result['load_ms']:.3f} ms, "
+                  f"{result['bytes']} bytes")
+
+
+if __name__ == '__main__':
+    main()
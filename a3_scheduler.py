@@ -0,0 +1,140 @@
+from a3_support import *
+import time
+
+CATCH_UP = 'catch-up'
+SKIP = 'skip'
+MAX_CATCH_UP = 5
+
+class _Chain:
+    """The state of one repeating callback of a TickScheduler."""
+    __slots__ = ('interval', 'callback', 'policy', 'deadline', 'remaining', 'after_id', 'running')
+
+    def __init__(self, interval: float, callback, policy: str) -> None:
+        self.interval = interval
+        self.callback = callback
+        self.policy = policy
+        self.deadline = 0.0
+        self.remaining = None
+        self.after_id = None
+        self.running = False
+
+class TickScheduler:
+    """TickScheduler owns every repeating after() chain of a window. Each
+    named chain calls its callback every interval seconds measured against a
+    monotonic clock, rather than re-arming a fixed delay after each call, so
+    the time a callback takes does not accumulate as drift.
+
+    A chain has at most one pending after() at any time: starting a running
+    chain re-arms it instead of adding a second one. When a tick is late by
+    more than an interval, a CATCH_UP chain calls its callback once per missed
+    tick (up to MAX_CATCH_UP) while a SKIP chain calls it once and drops the
+    missed ticks.
+
+    The master only needs after() and after_cancel(), so any tk widget works."""
+    def __init__(self, master, clock=time.monotonic) -> None:
+        """
+        Parameters:
+            master: master,
+            The widget whose after() the ticks are scheduled with
+
+            clock: function,
+            Returns the current time in seconds, monotonic
+        """
+        self._master = master
+        self._clock = clock
+        self._chains = {}
+
+    def add(self, name: str, interval: float, callback, policy: str = SKIP) -> None:
+        """Define a chain calling callback() every interval seconds. The chain
+        does not run until it is started; defining a name again cancels the
+        previous chain of that name."""
+        if policy not in (CATCH_UP, SKIP):
+            raise ValueError(f'Unknown tick policy: {policy!r}')
+
+        if name in self._chains:
+            self.stop(name)
+        self._chains[name] = _Chain(interval, callback, policy)
+
+    def start(self, name: str) -> None:
+        """Run a chain from now, its first tick a whole interval away. A chain
+        already running or paused starts over."""
+        chain = self._chains[name]
+        self._cancel(chain)
+        chain.remaining = None
+        chain.running = True
+        chain.deadline = self._clock() + chain.interval
+        self._arm(chain)
+
+    def stop(self, name: str) -> None:
+        """Stop a chain, forgetting any paused time."""
+        chain = self._chains[name]
+        self._cancel(chain)
+        chain.remaining = None
+        chain.running = False
+
+    def pause(self, name: str) -> None:
+        """Stop a chain, remembering how long its next tick was away."""
+        chain = self._chains[name]
+        if chain.running:
+            chain.remaining = max(0.0, chain.deadline - self._clock())
+            self._cancel(chain)
+            chain.running = False
+
+    def resume(self, name: str) -> None:
+        """Run a paused chain again, its next tick as far away as when it was
+        paused. A chain that is already running is left alone."""
+        chain = self._chains[name]
+        if chain.running:
+            return
+
+        remaining = chain.interval if chain.remaining is None else chain.remaining
+        chain.remaining = None
+        chain.running = True
+        chain.deadline = self._clock() + remaining
+        self._arm(chain)
+
+    def stop_all(self) -> None:
+        """Stop every chain, for instance before the window is destroyed."""
+        for name in self._chains:
+            self.stop(name)
+
+    def is_running(self, name: str) -> bool:
+        """Return whether a chain is running."""
+        return self._chains[name].running
+
+    def get_pending(self) -> int:
+        """Return the number of after() callbacks pending, at most one per chain."""
+        return sum(chain.after_id is not None for chain in self._chains.values())
+
+    def _cancel(self, chain: _Chain) -> None:
+        """Cancel the pending after() of a chain, if any."""
+        if chain.after_id is not None:
+            self._master.after_cancel(chain.after_id)
+            chain.after_id = None
+
+    def _arm(self, chain: _Chain) -> None:
+        """Schedule the after() of a chain's next deadline."""
+        delay = max(0, round((chain.deadline - self._clock())*1000))
+        chain.after_id = self._master.after(delay, lambda: self._tick(chain))
+
+    def _tick(self, chain: _Chain) -> None:
+        """Call a chain's callback for its due ticks, then schedule the next."""
+        chain.after_id = None
+        if not chain.running:
+            return
+
+        now = self._clock()
+        due = max(1, int((now - chain.deadline)//chain.interval) + 1)
+        calls = min(due, MAX_CATCH_UP) if chain.policy == CATCH_UP else 1
+        chain.deadline += due*chain.interval
+
+        # a callback may stop, pause or restart its own chain, which leaves it
+        # either not running or already armed
+        try:
+            for _ in range(calls):
+                chain.callback()
+                if not chain.running or chain.after_id is not None:
+                    return
+        finally:
+            if chain.running and chain.after_id is None:
+                self._arm(chain)
@@ -0,0 +1,155 @@
+from a3_support import *
+from a3_model import *
+import argparse
+import os
+import time
+from collections import OrderedDict
+from PIL import Image
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+
+def build_atlas(directory: str = DEFAULT_DIRECTORY) -> Image.Image:
+    """Return the sprite atlas assembled from the separate IMAGES files: one
+    row of equal square tiles in ATLAS_ORDER, each sprite centred in its tile."""
+    sprites = []
+    for display in ATLAS_ORDER:
+        with Image.open(os.path.join(directory, IMAGES[display])) as image:
+            sprites.append(image.convert('RGBA'))
+
+    tile = max(max(sprite.size) for sprite in sprites)
+    atlas = Image.new('RGBA', (tile*len(sprites), tile), (0, 0, 0, 0))
+    for index, sprite in enumerate(sprites):
+        atlas.paste(sprite, (index*tile + (tile - sprite.width)//2, (tile - sprite.height)//2))
+    return atlas
+
+class SpriteAtlas:
+    """SpriteAtlas decodes the sprite atlas once, slices it into one sprite per
+    entity and keeps each sprite prescaled to the cell sizes it is drawn at.
+
+    Scaling uses the Lanczos filter and each (display, cell size) is scaled
+    only once; at most max_scaled scaled sprites are kept, dropping the least
+    recently used. A change of cell size, such as a resized field, only scales
+    the sliced sprites again and never decodes the atlas again. If the atlas
+    file is missing it is assembled from the separate IMAGES files."""
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_scaled: int = 64) -> None:
+        """
+        Parameters:
+            directory: str,
+            The directory ATLAS_FILE (or else the IMAGES files) is read from
+
+            max_scaled: int,
+            The largest number of scaled sprites kept at once
+        """
+        start = time.perf_counter()
+        path = os.path.join(directory, ATLAS_FILE)
+        if os.path.exists(path):
+            with Image.open(path) as image:
+                atlas = image.convert('RGBA')
+        else:
+            atlas = build_atlas(directory)
+
+        tile = atlas.height
+        self._sprites = {display: atlas.crop((index*tile, 0, (index + 1)*tile, tile))
+                         for index, display in enumerate(ATLAS_ORDER)}
+        self._load_seconds = time.perf_counter() - start
+
+        self._max_scaled = max_scaled
+        self._scaled = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._scale_seconds = 0.0
+
+    def get_sprite(self, display: str) -> Image.Image:
+        """Return the unscaled sprite of the entity with the given display character."""
+        return self._sprites[display]
+
+    def get_scaled(self, display: str, cell_size: Tuple[int, int]) -> Image.Image:
+        """Return the sprite of an entity scaled to cells of the given
+        (width, height) in pixels."""
+        key = (display, cell_size)
+        scaled = self._scaled.get(key)
+        if scaled is not None:
+            self._hits += 1
+            self._scaled.move_to_end(key)
+            return scaled
+
+        self._misses += 1
+        start = time.perf_counter()
+        scaled = self._sprites[display].resize((max(1, cell_size[0]), max(1, cell_size[1])), Image.LANCZOS)
+        self._scale_seconds += time.perf_counter() - start
+
+        self._scaled[key] = scaled
+        if len(self._scaled) > self._max_scaled:
+            self._scaled.popitem(last=False)
+        return scaled
+
+    def prescale(self, cell_size: Tuple[int, int]) -> None:
+        """Scale every sprite to a cell size ahead of the first frame drawn at it."""
+        for display in ATLAS_ORDER:
+            self.get_scaled(display, cell_size)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return the seconds spent decoding and slicing the atlas and scaling
+        sprites, the number of scaled sprites held and the scale cache hits
+        and misses."""
+        return {'load_seconds': self._load_seconds,
+                'scale_seconds': self._scale_seconds,
+                'scaled': len(self._scaled),
+                'hits': self._hits,
+                'misses': self._misses}
+
+def bench(sizes, directory: str = DEFAULT_DIRECTORY) -> List[Dict[str, float]]:
+    """Time loading the atlas and the separate PNGs, then for each grid size
+    prescaling the sprites and compositing the first frame of a full field."""
+    from a3_composite import FrameCompositor
+
+    SpriteAtlas(directory)  # load Pillow's plugins first so neither timing pays for it
+    start = time.perf_counter()
+    for display in ATLAS_ORDER:
+        with Image.open(os.path.join(directory, IMAGES[display])) as image:
+            image.load()
+    separate_seconds = time.perf_counter() - start
+
+    results = []
+    for size in sizes:
+        atlas = SpriteAtlas(directory)
+        cell_size = (MAP_WIDTH//size, MAP_HEIGHT//size)
+        start = time.perf_counter()
+        atlas.prescale(cell_size)
+        prescale_seconds = time.perf_counter() - start
+
+        entities = {Position(x, y): Player() if y == 0 else Collectable()
+                    for y in range(size) for x in range(size) if y or x == size//2}
+        start = time.perf_counter()
+        FrameCompositor(size, MAP_WIDTH, MAP_HEIGHT, atlas.get_scaled).render(entities)
+        first_frame_seconds = time.perf_counter() - start
+
+        results.append({'size': size,
+                        'separate_load_ms': separate_seconds*1e3,
+                        'atlas_load_ms': atlas.get_stats()['load_seconds']*1e3,
+                        'prescale_ms': prescale_seconds*1e3,
+                        'first_frame_ms': first_frame_seconds*1e3})
+    return results
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Build the sprite atlas, or time loading it and drawing a first frame."""
+    parser = argparse.ArgumentParser(description='Build or benchmark the Hacker sprite atlas.')
+    parser.add_argument('--build', action='store_true', help=f'write {ATLAS_FILE} from the separate images')
+    parser.add_argument('--bench', type=int, nargs='*', metavar='SIZE', help='grid sizes to time')
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY)
+    args = parser.parse_args(argv)
+
+    if args.build:
+        path = os.path.join(args.directory, ATLAS_FILE)
+        build_atlas(args.directory).save(path, optimize=True)
+        print(f"wrote {path}")
+
+    if args.bench is not None:
+        for result in bench(args.bench or [GRID_SIZE, 64, 256], args.directory):
+            print(f"size {result['size']:>5}: load {result['atlas_load_ms']:.2f} ms "
+                  f"(separate PNGs {result['separate_load_ms']:.2f} ms), "
+                  f"prescale {result['prescale_ms']:.2f} ms, first frame {result['first_frame_ms']:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
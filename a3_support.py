@@ -46,7 +46,37 @@ IMAGES = {COLLECTABLE: "C.png",
           PLAYER: "P.png",
           BOMB: "O.png"}
 
+# every sprite in one row of square tiles, in this order
+ATLAS_FILE = "atlas.png"
+ATLAS_ORDER = (COLLECTABLE, DESTROYABLE, BLOCKER, PLAYER, BOMB)
+
 GRID_SIZE = 7
+SCORE_ROWS = 7  # rows the score bar is laid out in, whatever the grid size
+SAVE_FILE = "director_test_game_save.save"
+JOURNAL_FILE = "hacker_journal.log"
+BOT_KEY = "B"
+REWIND_KEY = "Z"
+REWIND_HISTORY = 1000
+PROFILE_KEY = "P"
+PROFILE_ENV = "HACKER_PROFILE"
+PROFILE_FILE = "hacker_profile.json"
+STEP_CHAIN = "step"
+TIMER_CHAIN = "timer"
+STEP_SECONDS = 2.0
+TIMER_SECONDS = 1.0
+FRAME_CHAIN = "frame"
+FRAME_SECONDS = 1/60
+WORKER_ENV = "HACKER_WORKER"
+RENDER_ENV = "HACKER_RENDER"
+COMPOSITE_RENDER = "composite"
+
+# small integer codes for each entity type, used by array and binary encodings
+EMPTY_CODE = 0
+TYPE_CODES = {PLAYER: 1,
+              COLLECTABLE: 2,
+              DESTROYABLE: 3,
+              BLOCKER: 4,
+              BOMB: 5}
 
 
 class Position:
@@ -65,7 +95,10 @@ class Position:
         2
         >>> position.get_y()
         4
+
+    Positions never change, so they are slotted and compute their hash once.
     """
+    __slots__ = ('_x', '_y', '_hash')
 
     def __init__(self, x: int, y: int):
         """
@@ -78,6 +111,7 @@ class Position:
         """
         self._x = x
         self._y = y
+        self._hash = hash((x, y))
 
     def get_x(self) -> int:
         """Returns the x coordinate of the position."""
@@ -149,7 +183,7 @@ class Position:
         # https://www.pythontutorial.net/python-oop/python-__eq__/
         if not isinstance(other, Position):
             return False
-        return self.get_x() == other.get_x() and self.get_y() == other.get_y()
+        return self._x == other._x and self._y == other._y
 
     def __hash__(self) -> int:
         """
@@ -160,11 +194,11 @@ class Position:
         A hash should be based on the unique data of a class, in the case
         of the position class, the unique data is the x and y values.
         Therefore, we can calculate an appropriate hash by hashing a tuple of
-        the x and y values.
+        the x and y values. The hash is computed once, when the position is made.
 
         Reference: https://stackoverflow.com/questions/17585730/what-does-hash-do-in-python
         """
-        return hash((self.get_x(), self.get_y()))
+        return self._hash
 
     def __repr__(self) -> str:
         """
@@ -0,0 +1,293 @@
+from a3_support import *
+from a3_model import *
+from a3_headless import BACKENDS, new_game, apply_action
+import argparse
+import os
+import select
+import sys
+import time
+
+CSI = '\x1b['
+RESET_STYLE = CSI + '0m'
+CLEAR_SCREEN = CSI + '2J'
+HIDE_CURSOR = CSI + '?25l'
+SHOW_CURSOR = CSI + '?25h'
+CELL_WIDTH = 2
+STATUS_ROW = 1
+FIELD_ROW = 3
+
+# terminal input, mapped to the same actions handle_keypress gives these keys
+KEY_ACTIONS = {'a': LEFT, 'A': LEFT, 'd': RIGHT, 'D': RIGHT,
+               CSI + 'D': LEFT, CSI + 'C': RIGHT,
+               '\r': COLLECT, '\n': COLLECT, ' ': DESTROY}
+QUIT_KEYS = ('q', 'Q', '\x03')
+
+def ansi_colour(colour: str, background: bool = False) -> str:
+    """Return the 24-bit ANSI escape selecting a '#rrggbb' colour."""
+    red, green, blue = (int(colour[index:index + 2], 16) for index in (1, 3, 5))
+    return f'{CSI}{48 if background else 38};2;{red};{green};{blue}m'
+
+def decode_keys(data: str) -> Tuple[List[str], bool]:
+    """Return the actions typed in a chunk of terminal input and whether a
+    quit key was pressed. Unknown keys and escape sequences are ignored."""
+    actions = []
+    index = 0
+    while index < len(data):
+        key = data[index:index + 3] if data.startswith(CSI, index) else data[index]
+        index += len(key)
+        if key in QUIT_KEYS:
+            return actions, True
+
+        if key in KEY_ACTIONS:
+            actions.append(KEY_ACTIONS[key])
+    return actions, False
+
+class TerminalRenderer:
+    """TerminalRenderer draws a game on an ANSI terminal: each cell is its
+    display character on the background of its COLOURS entry, two columns
+    wide, under a status line with the counters.
+
+    The screen is only cleared once. The renderer then subscribes to the
+    grid and keeps its own copy of the grid's cells up to date from each
+    GridChange, noting the cells a change may have touched: the cells added,
+    removed or changed, and for a step or rotation the occupied cells before
+    and after the move. A frame only looks at those cells and writes the ones
+    that differ from what is on screen, each behind a cursor-addressing
+    escape unless it directly follows the previous cell written, with
+    colours only selected when they change. Nothing in a frame scans the
+    whole grid. The bytes written by every frame are recorded."""
+    def __init__(self, size: int, out=None) -> None:
+        """
+        Parameters:
+            size: int,
+            The rows and cols of the grid, size=rows=cols
+
+            out: file,
+            The text stream written to, standard output by default
+        """
+        self._size = size
+        self._out = out or sys.stdout
+        self._grid = None
+        self._cells = {}
+        self._shown = {}
+        self._dirty = set()
+        self._status = None
+        self._frame_bytes = []
+        self._empty = {y: ansi_colour(PLAYER_AREA if y == 0 else FIELD_COLOUR, True) for y in range(size)}
+        self._styles = {display: ansi_colour(colour, True) + ansi_colour(TITLE_BG)
+                        for display, colour in COLOURS.items()}
+
+    def _write(self, text: str) -> int:
+        """Write text to the terminal, returning the bytes written."""
+        self._out.write(text)
+        self._out.flush()
+        return len(text.encode())
+
+    def start(self, grid: AbstractGrid) -> int:
+        """Clear the screen to empty cells and follow the changes of a grid,
+        whose entities the next render draws. Returns the bytes written."""
+        self.stop_following()
+        self._grid = grid
+        grid.subscribe(self._on_change)
+        self._cells = dict(grid.serialise())
+        self._shown = {}
+        self._dirty = set(self._cells)
+        self._status = None
+        rows = []
+        for y in range(self._size):
+            rows.append(f'{CSI}{FIELD_ROW + y};1H{self._empty[y]}{" "*(CELL_WIDTH*self._size)}')
+        return self._write(HIDE_CURSOR + CLEAR_SCREEN + ''.join(rows) + RESET_STYLE)
+
+    def stop_following(self) -> None:
+        """Stop following the changes of the grid being drawn, if any."""
+        if self._grid is not None:
+            self._grid.unsubscribe(self._on_change)
+            self._grid = None
+
+    def stop(self) -> None:
+        """Leave the cursor under the field with the terminal's style restored."""
+        self.stop_following()
+        self._write(f'{RESET_STYLE}{CSI}{FIELD_ROW + self._size};1H\n{SHOW_CURSOR}')
+
+    def _on_change(self, change: GridChange) -> None:
+        """Bring the copy of the grid's cells up to date and note the cells
+        the change may have touched."""
+        for cells in (change.get_removed(), change.get_added(), change.get_changed()):
+            self._dirty.update(cells)
+
+        if change.get_shift() != (0, 0):
+            self._dirty.update(self._cells)
+            self._cells = change.apply(self._cells, self._size)
+            self._dirty.update(self._cells)
+        else:
+            for cell in change.get_removed():
+                self._cells.pop(cell, None)
+            self._cells.update(change.get_added())
+            self._cells.update(change.get_changed())
+
+    def render(self, game: Game, status: str = '') -> int:
+        """Write the cells that changed since the last frame and the status
+        line if it changed, returning the bytes written. Only the cells noted
+        by the changes since the last frame are looked at. The cells are laid
+        out first, so the status line can show the bytes they
+        take in this same frame.
+
+        Parameters:
+            game: Game,
+            The game drawn
+
+            status: str,
+            Text shown after the counters on the status line
+        """
+        parts = []
+        style = None
+        cursor = None
+        for x, y in sorted(self._dirty, key=lambda cell: (cell[1], cell[0])):
+            display = self._cells.get((x, y))
+            if self._shown.get((x, y)) == display or not (0 <= x < self._size and 0 <= y < self._size):
+                continue
+
+            if display is None:
+                del self._shown[(x, y)]
+            else:
+                self._shown[(x, y)] = display
+
+            if cursor != (x, y):
+                parts.append(f'{CSI}{FIELD_ROW + y};{CELL_WIDTH*x + 1}H')
+            cell_style = self._empty[y] if display is None else self._styles[display]
+            if cell_style != style:
+                parts.append(cell_style)
+                style = cell_style
+            parts.append((display or ' ').ljust(CELL_WIDTH))
+            cursor = (x + 1, y)
+        self._dirty.clear()
+
+        if style is not None:
+            parts.append(RESET_STYLE)
+            style = None
+        cell_bytes = len(''.join(parts).encode())
+
+        line = (f'Collected {game.get_num_collected()}  Destroyed {game.get_num_destroyed()}  '
+                f'Shots {game.get_total_shots()}  {status}  {cell_bytes} B of cells this frame')
+        if line != self._status:
+            parts.append(f'{CSI}{STATUS_ROW};1H{line}{CSI}K')
+            self._status = line
+
+        written = self._write(''.join(parts)) if parts else 0
+        self._frame_bytes.append(written)
+        return written
+
+    def full_frame_bytes(self) -> int:
+        """Return the bytes a repaint of every cell would take, for comparing
+        the diffs against."""
+        return len((CLEAR_SCREEN + ''.join(f'{CSI}{FIELD_ROW + y};1H' + ''.join(
+            self._styles[self._shown[(x, y)]] + self._shown[(x, y)].ljust(CELL_WIDTH)
+            if (x, y) in self._shown else self._empty[y] + ' '*CELL_WIDTH for x in range(self._size))
+            for y in range(self._size))).encode())
+
+    def get_frame_bytes(self) -> List[int]:
+        """Return the bytes written by every frame rendered so far."""
+        return list(self._frame_bytes)
+
+class RawInput:
+    """Context manager putting a terminal into cbreak mode for reading single
+    key presses without echo, restoring it on exit. Does nothing if the
+    stream is not a terminal."""
+    def __init__(self, stream=None) -> None:
+        self._stream = stream or sys.stdin
+        self._saved = None
+
+    def __enter__(self) -> 'RawInput':
+        if self._stream.isatty():
+            import termios
+            import tty
+            self._saved = termios.tcgetattr(self._stream)
+            tty.setcbreak(self._stream)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._saved is not None:
+            import termios
+            termios.tcsetattr(self._stream, termios.TCSADRAIN, self._saved)
+
+    def read(self, timeout: float) -> str:
+        """Return the keys pressed within timeout seconds, or '' if none were."""
+        if self._saved is None:
+            time.sleep(max(0.0, timeout))
+            return ''
+
+        ready, _, _ = select.select([self._stream], [], [], max(0.0, timeout))
+        return os.read(self._stream.fileno(), 64).decode(errors='ignore') if ready else ''
+
+def play(game: Game, renderer: TerminalRenderer, keys: RawInput, policy=None,
+         tick_seconds: float = STEP_SECONDS, max_ticks: Optional[int] = None) -> Tuple[int, Optional[bool]]:
+    """Play a game on the terminal until it ends, max_ticks pass or a quit
+    key is pressed. Keys are applied and drawn as they arrive; each step,
+    the policy's actions (if any) are applied first. Steps are scheduled
+    against a monotonic clock so drawing does not delay them.
+
+    return:
+        Tuple(number of ticks played, the outcome or None)
+    """
+    renderer.start(game.get_grid())
+    renderer.render(game)
+    ticks = 0
+    deadline = time.monotonic() + tick_seconds
+    while max_ticks is None or ticks < max_ticks:
+        actions, quit_pressed = decode_keys(keys.read(deadline - time.monotonic()))
+        if quit_pressed:
+            break
+
+        for action in actions:
+            apply_action(game, action)
+
+        stepped = time.monotonic() >= deadline
+        if stepped:
+            for action in policy(game) if policy is not None else ():
+                apply_action(game, action)
+            game.step()
+            ticks += 1
+            deadline += tick_seconds
+
+        if actions or stepped:
+            renderer.render(game, f'Tick {ticks}')
+
+        if game.has_won() is not None:
+            break
+
+    renderer.stop()
+    return ticks, game.has_won()
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, float]:
+    """Play or watch a game in the terminal and report the bytes written per frame."""
+    from a3_montecarlo import make_policy
+
+    parser = argparse.ArgumentParser(description='Play or watch Hacker in an ANSI terminal.')
+    parser.add_argument('--size', type=int, default=GRID_SIZE)
+    parser.add_argument('--backend', choices=tuple(BACKENDS), default='dict')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--policy', default=None, help="play with random, idle, script:<actions> or module:factory")
+    parser.add_argument('--tick-seconds', type=float, default=STEP_SECONDS)
+    parser.add_argument('--max-ticks', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    game = new_game(args.size, BACKENDS[args.backend], args.seed)
+    policy = make_policy(args.policy, game.get_seed()) if args.policy else None
+    renderer = TerminalRenderer(args.size)
+    with RawInput() as keys:
+        ticks, outcome = play(game, renderer, keys, policy, args.tick_seconds, args.max_ticks)
+
+    frames = renderer.get_frame_bytes()
+    summary = {'ticks': ticks,
+               'frames': len(frames),
+               'mean_frame_bytes': sum(frames)/len(frames) if frames else 0.0,
+               'max_frame_bytes': max(frames, default=0),
+               'full_frame_bytes': renderer.full_frame_bytes()}
+    print(f"{'won' if outcome else 'lost' if outcome is not None else 'stopped'} after {ticks} ticks; "
+          f"{summary['frames']} frames of {summary['mean_frame_bytes']:.0f} bytes on average "
+          f"(max {summary['max_frame_bytes']}), a full repaint is {summary['full_frame_bytes']} bytes")
+    return summary
+
+
+if __name__ == '__main__':
+    main()
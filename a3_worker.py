@@ -0,0 +1,227 @@
+from a3_support import *
+from a3_model import *
+from a3_journal import Journal, ROTATE, FIRE, STEP, REWIND
+from a3_profile import TickProfiler
+import a3_save
+import os
+import queue
+import threading
+from collections import deque
+
+BOT = 'bot'
+RESET = 'reset'
+SAVE = 'save'
+STOP = 'stop'
+
+def worker_requested() -> bool:
+    """Return whether the WORKER_ENV variable asks for the model to run on a
+    worker thread, i.e. is set to anything other than '' or '0'."""
+    return os.environ.get(WORKER_ENV, '') not in ('', '0')
+
+class GameFrame:
+    """GameFrame is everything the views draw of a game at one moment: its
+    entities at their positions, its counters and its outcome. A frame holds
+    its own copy of the entities and is never changed, so it can be handed
+    from the thread running the game to the one drawing it."""
+    def __init__(self, entities: Dict[Position, Entity], collected: int, destroyed: int, total_shots: int,
+                 outcome: Optional[bool], input_time: Optional[float] = None) -> None:
+        """
+        Parameters:
+            entities: Dict[Position, Entity],
+            The entities of the grid, players included
+
+            collected, destroyed, total_shots: int,
+            The counters of the game
+
+            outcome: bool,
+            True if the game was won, False if it was lost, None if it goes on
+
+            input_time: float,
+            The time.perf_counter() of the earliest input the frame shows the
+            result of, or None if it only shows steps
+        """
+        self._entities = entities
+        self._collected = collected
+        self._destroyed = destroyed
+        self._total_shots = total_shots
+        self._outcome = outcome
+        self._input_time = input_time
+
+    @classmethod
+    def capture(cls, game: Game, input_time: Optional[float] = None) -> 'GameFrame':
+        """Return the frame of a game as it is now."""
+        return cls(game.get_grid().get_entities(), game.get_num_collected(), game.get_num_destroyed(),
+                   game.get_total_shots(), game.has_won(), input_time)
+
+    def get_entities(self) -> Dict[Position, Entity]:
+        """Return the entities of the frame, which must not be changed."""
+        return self._entities
+
+    def get_num_collected(self) -> int:
+        """Return the number of entities collected."""
+        return self._collected
+
+    def get_num_destroyed(self) -> int:
+        """Return the number of entities destroyed."""
+        return self._destroyed
+
+    def get_total_shots(self) -> int:
+        """Return the number of shots fired."""
+        return self._total_shots
+
+    def get_outcome(self) -> Optional[bool]:
+        """Return True if the game was won, False if it was lost, None otherwise."""
+        return self._outcome
+
+    def get_input_time(self) -> Optional[float]:
+        """Return the time.perf_counter() of the earliest input shown, if any."""
+        return self._input_time
+
+class GameWorker:
+    """GameWorker runs a game on its own thread. The thread owns the game,
+    its journal and its rewind history: other threads only submit commands
+    (the journal's ROTATE, FIRE, STEP and REWIND plus BOT, RESET, SAVE and
+    STOP) to a queue and take the frames it publishes.
+
+    The worker applies every command already waiting before it publishes a
+    frame, and only the newest frame is kept, so a slow reader skips stale
+    frames instead of falling behind. The interpreter lock still runs one
+    thread at a time; what the worker buys is that a long step is sliced
+    into the interpreter's switch interval rather than blocking input
+    handling until it ends."""
+    def __init__(self, game: Game, journal: Journal, profiler: Optional[TickProfiler] = None,
+                 history: int = 0) -> None:
+        """
+        Parameters:
+            game: Game,
+            The game the worker takes over, with its journal already started
+
+            journal: Journal,
+            The journal every command is recorded in
+
+            profiler: TickProfiler,
+            Times the model, journal, bot and frame phases on the worker thread
+
+            history: int,
+            The number of snapshots kept for REWIND, 0 to not keep any
+        """
+        self._game = game
+        self._journal = journal
+        self._profiler = profiler or TickProfiler()
+        self._history = deque(maxlen=history)
+        self._bot = None
+
+        self._commands = queue.Queue()
+        self._frame_lock = threading.Lock()
+        self._frame = None
+        self._published = 0
+        self._dropped = 0
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='hacker-model', daemon=True)
+
+    def start(self) -> None:
+        """Start the worker thread."""
+        self._thread.start()
+
+    def submit(self, command: str, *args, input_time: Optional[float] = None) -> None:
+        """Queue a command with its arguments. input_time is the
+        time.perf_counter() of the input that caused it, for measuring the
+        latency until its frame is drawn."""
+        self._commands.put((command, args, input_time))
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Stop the worker after the commands already queued, waiting up to
+        timeout seconds for it to finish."""
+        self.submit(STOP)
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def take_frame(self) -> Optional[GameFrame]:
+        """Return the newest frame published since the last call, or None.
+        Raises RuntimeError if the worker thread failed."""
+        if self._error is not None:
+            raise RuntimeError('The game worker stopped') from self._error
+
+        with self._frame_lock:
+            frame, self._frame = self._frame, None
+        return frame
+
+    def get_stats(self) -> Dict[str, int]:
+        """Return the number of frames published and dropped unread."""
+        return {'published': self._published, 'dropped': self._dropped}
+
+    def _run(self) -> None:
+        """Apply commands as they arrive, publishing a frame after each batch."""
+        try:
+            while True:
+                command, args, input_time = self._commands.get()
+                applied, earliest = 0, None
+                while command != STOP:
+                    self._apply(command, args)
+                    applied += 1
+                    if earliest is None:
+                        earliest = input_time
+                    try:
+                        command, args, input_time = self._commands.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if applied:
+                    with self._profiler.phase('frame'):
+                        frame = GameFrame.capture(self._game, earliest)
+                    with self._frame_lock:
+                        self._dropped += self._frame is not None
+                        self._frame = frame
+                        self._published += 1
+
+                if command == STOP:
+                    return
+        except Exception as error:
+            self._error = error
+
+    def _apply(self, command: str, args: tuple) -> None:
+        """Apply one command to the game and record it in the journal."""
+        if command == ROTATE:
+            with self._profiler.phase('model'):
+                self._game.rotate_grid(*args)
+            with self._profiler.phase('journal'):
+                self._journal.record_rotate(*args)
+
+        elif command == FIRE:
+            with self._profiler.phase('model'):
+                self._game.fire(*args)
+            with self._profiler.phase('journal'):
+                self._journal.record_fire(*args)
+
+        elif command == STEP:
+            if self._bot is not None:
+                with self._profiler.phase('bot'):
+                    actions = self._bot.plan(self._game)
+                for action in actions:
+                    self._apply(ROTATE if action in DIRECTIONS else FIRE, (action,))
+
+            with self._profiler.phase('model'):
+                if self._history.maxlen:
+                    self._history.append(self._game.snapshot())
+                self._game.step()
+            with self._profiler.phase('journal'):
+                self._journal.record_step(self._game)
+
+        elif command == REWIND:
+            if self._history:
+                self._game.restore(self._history.pop())
+                self._journal.record_rewind()
+
+        elif command == BOT:
+            self._bot, = args
+
+        elif command == RESET:
+            self._game, save_path = args
+            self._journal.start(self._game, save_path)
+            self._history.clear()
+
+        elif command == SAVE:
+            a3_save.save_game(args[0], self._game, *args[1:])
+
+        else:
+            raise ValueError(f'Unknown worker command: {command!r}')